@@ -6,7 +6,10 @@ colin.dietrich@noaa.gov
 """
 
 
+import warnings
+
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 
 
@@ -106,6 +109,82 @@ def float_year_to_datetime(fy):
     return result
 
 
+def float_years_to_datetime(fy):
+    """Convert an array of floating point years to datetime, vectorized
+    version of float_year_to_datetime.  NaN values return NaT.
+
+    Parameters
+    ----------
+    fy : array-like of float
+
+    Returns
+    -------
+    Pandas DatetimeIndex
+    """
+
+    fy = np.atleast_1d(np.asarray(fy, dtype=float))
+    valid = np.isfinite(fy)
+    year = np.where(valid, np.floor(fy), 1970).astype(np.int64)
+
+    # year start and length as datetime64 arrays
+    start = (year - 1970).astype('datetime64[Y]').astype('datetime64[ns]')
+    end = (year - 1969).astype('datetime64[Y]').astype('datetime64[ns]')
+    length = (end - start).astype(np.int64)
+
+    offset = np.round(np.where(valid, fy - year, 0) * length).astype('timedelta64[ns]')
+    result = start + offset
+    result[~valid] = np.datetime64('NaT')
+    return pd.DatetimeIndex(result)
+
+
+def datetime_to_float_year(t):
+    """Convert datetime values to floating point years, the inverse of
+    float_years_to_datetime.  NaT values return NaN.
+
+    Parameters
+    ----------
+    t : array-like of datetime64
+
+    Returns
+    -------
+    array of float
+    """
+
+    t = pd.DatetimeIndex(np.atleast_1d(t)).values.astype('datetime64[ns]')
+    valid = ~np.isnat(t)
+    year = np.where(valid, t.astype('datetime64[Y]').astype(np.int64), 0)
+
+    start = year.astype('datetime64[Y]').astype('datetime64[ns]')
+    end = (year + 1).astype('datetime64[Y]').astype('datetime64[ns]')
+
+    elapsed = (np.where(valid, t, start) - start).astype(np.int64)
+    length = (end - start).astype(np.int64)
+
+    fy = 1970 + year + elapsed / length
+    fy[~valid] = np.nan
+    return fy
+
+
+def days_of_year(t):
+    """Decimal days since the beginning of the year, vectorized version
+    of day_of_year.  NaT values return NaN.
+
+    Parameters
+    ----------
+    t : array-like of datetime64
+
+    Returns
+    -------
+    array of float, 1.0 at midnight January 1st
+    """
+
+    t = pd.DatetimeIndex(np.atleast_1d(t)).values.astype('datetime64[ns]')
+    start = t.astype('datetime64[Y]').astype('datetime64[ns]')
+    doy = 1.0 + (t - start).astype(np.int64) / 8.64e+13
+    doy[np.isnat(t)] = np.nan
+    return doy
+
+
 def decimal_degrees(c):
     """Take a decimal minutes angular measurement and return a decimal
     degrees angular measurement.
@@ -134,6 +213,10 @@ def decimal_degrees(c):
     return decimal
 
 
+# sine of latitude of the ESRL MBL grid
+mbl_lat_sin = np.linspace(-1.0, 1.0, 41)
+
+
 def get_mbl(df, m):
     """Get the time series CO2 data for a specific latitude.
 
@@ -153,9 +236,7 @@ def get_mbl(df, m):
     if (m > 90) or (m < -90):
         raise ValueError("Cannot be >90 or <-90")
 
-    lat_sin = np.linspace(-1.0, 1.0, 41)
-
-    n = lat_sin[np.argmin(np.abs(lat_sin - np.sin(np.deg2rad(m))))]
+    n = mbl_lat_sin[np.argmin(np.abs(mbl_lat_sin - np.sin(np.deg2rad(m))))]
     n = '{:.2f}'.format(n)
     n_uncert = n + '_uncert'
 
@@ -253,13 +334,13 @@ def m1_algebraic(x, y, x_m=None, y_m=None):
     # linear system defining the center in reduced coordinates (uc, vc):
     #    Suu * uc +  Suv * vc = (Suuu + Suvv)/2
     #    Suv * uc +  Svv * vc = (Suuv + Svvv)/2
-    Suv  = sum(u*v)
-    Suu  = sum(u**2)
-    Svv  = sum(v**2)
-    Suuv = sum(u**2 * v)
-    Suvv = sum(u * v**2)
-    Suuu = sum(u**3)
-    Svvv = sum(v**3)
+    Suv  = np.sum(u*v)
+    Suu  = np.sum(u**2)
+    Svv  = np.sum(v**2)
+    Suuv = np.sum(u**2 * v)
+    Suvv = np.sum(u * v**2)
+    Suuu = np.sum(u**3)
+    Svvv = np.sum(v**3)
 
     # Solving the linear system
     A = np.array([ [ Suu, Suv ], [Suv, Svv]])
@@ -294,3 +375,169 @@ def lsq_circle(x, y, x_m=None, y_m=None):
     x_fit = xc + r * np.cos(theta_fit)
     y_fit = yc + r * np.sin(theta_fit)
     return xc, yc, x_fit, y_fit, ri, r, residu, residu2
+
+
+def circle_points(xc, yc, r, n=180):
+    """x, y values of a circle for plotting
+
+    Parameters
+    ----------
+    xc : float, x center value
+    yc : float, y center value
+    r : float, radius
+    n : int, number of points
+
+    Returns
+    -------
+    x_fit, y_fit : arrays of float
+    """
+    theta_fit = np.linspace(-np.pi, np.pi, n)
+    return xc + r * np.cos(theta_fit), yc + r * np.sin(theta_fit)
+
+
+def m1_algebraic_batch(x, y, w=None):
+    """Batched, weighted version of m1_algebraic.  Fits one circle per row
+    of 2D arrays, NaN values are ignored so rows can be padded.
+
+    Parameters
+    ----------
+    x : 2D array, values, one circle per row
+    y : 2D array, values same shape as x
+    w : 2D array, weight of each value, optional
+
+    Returns
+    -------
+    xc : array, x center value of each row, NaN where the row has fewer
+        than 3 distinct, non-collinear points
+    yc : array, y center value of each row, NaN as xc
+    Ri : 2D array, distance from center for each (x, y)
+    R : array, weighted mean value of Ri
+    """
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if w is None:
+        w = valid.astype(float)
+    else:
+        w = np.where(valid, w, 0.0)
+    x0 = np.where(valid, x, 0.0)
+    y0 = np.where(valid, y, 0.0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # weighted barycenter and reduced coordinates
+        w_sum = w.sum(axis=1)
+        x_m = np.einsum('ij,ij->i', w, x0) / w_sum
+        y_m = np.einsum('ij,ij->i', w, y0) / w_sum
+        u = np.where(valid, x0 - x_m[:, np.newaxis], 0.0)
+        v = np.where(valid, y0 - y_m[:, np.newaxis], 0.0)
+
+        Suv = np.einsum('ij,ij,ij->i', w, u, v)
+        Suu = np.einsum('ij,ij,ij->i', w, u, u)
+        Svv = np.einsum('ij,ij,ij->i', w, v, v)
+        Suuv = np.einsum('ij,ij,ij,ij->i', w, u, u, v)
+        Suvv = np.einsum('ij,ij,ij,ij->i', w, u, v, v)
+        Suuu = np.einsum('ij,ij,ij,ij->i', w, u, u, u)
+        Svvv = np.einsum('ij,ij,ij,ij->i', w, v, v, v)
+
+        # one 2x2 linear system per row, solved directly so that rows with
+        # a single, repeated or collinear points (singular) are NaN
+        # instead of failing the whole batch
+        B_u = (Suuu + Suvv) / 2.0
+        B_v = (Svvv + Suuv) / 2.0
+        det = Suu * Svv - Suv * Suv
+        det = np.where(det == 0, np.nan, det)
+        xc = x_m + (B_u * Svv - Suv * B_v) / det
+        yc = y_m + (Suu * B_v - Suv * B_u) / det
+
+        Ri = np.sqrt((x - xc[:, np.newaxis])**2 + (y - yc[:, np.newaxis])**2)
+        R = np.einsum('ij,ij->i', w, np.where(valid, Ri, 0.0)) / w_sum
+
+    return xc, yc, Ri, R
+
+
+def lsq_circles(df, x='lon', y='lat', by='system', robust=False,
+                k=4.685, iterations=20):
+    """Fit a watch circle to every group of df in one batched call,
+    i.e. per deployment, or per rolling window by grouping on a floored
+    time column as well as the system.
+
+    With robust=True the fit is repeated with Tukey biweights from the
+    radial residuals, so off station fixes are down weighted to zero.
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, with x, y and by columns
+    x : str, column of x values
+    y : str, column of y values
+    by : str or list of str, column(s) identifying each circle
+    robust : bool, use iterative reweighting to reject outliers
+    k : float, biweight tuning constant in units of the robust residual std
+    iterations : int, maximum reweighting iterations
+
+    Returns
+    -------
+    fits : Pandas DataFrame, indexed by the group values with columns:
+        xc, yc : anchor position estimate
+        r : radius
+        residu : residual sum of squares
+        residu2 : sum of squared residual squares
+        rms : weighted root mean square radial residual
+        n : number of values
+    residuals : Pandas Series, radial residual Ri - R of each row of df
+    """
+
+    groups = df.groupby(by, sort=True)
+    codes = groups.ngroup().values
+    position = groups.cumcount().values
+    n = np.bincount(codes)
+
+    shape = (len(n), n.max())
+    xs = np.full(shape, np.nan)
+    ys = np.full(shape, np.nan)
+    xs[codes, position] = df[x].values
+    ys[codes, position] = df[y].values
+
+    w = None
+    xc, yc, Ri, R = m1_algebraic_batch(xs, ys)
+    if robust:
+        # start from the median position so outliers can't bias the first weights
+        Ri = np.sqrt((xs - np.nanmedian(xs, axis=1)[:, np.newaxis])**2 +
+                     (ys - np.nanmedian(ys, axis=1)[:, np.newaxis])**2)
+        R = np.nanmedian(Ri, axis=1)
+        for _ in range(iterations):
+            res = Ri - R[:, np.newaxis]
+            with warnings.catch_warnings():
+                # groups that could not be fit are all NaN
+                warnings.simplefilter('ignore', RuntimeWarning)
+                scale = 1.4826 * np.nanmedian(np.abs(res), axis=1)[:, np.newaxis]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z = res / (k * scale)
+            w_new = np.where(np.abs(z) < 1.0, (1.0 - z**2)**2, 0.0)
+            if w is not None and np.nanmax(np.abs(w_new - w)) < 1e-6:
+                break
+            w = w_new
+            xc, yc, Ri, R = m1_algebraic_batch(xs, ys, w)
+
+    res = Ri - R[:, np.newaxis]
+    w_fit = np.where(np.isnan(res), 0.0, 1.0 if w is None else w)
+    res0 = np.where(np.isnan(res), 0.0, res)
+    sq0 = np.where(np.isnan(Ri), 0.0, Ri**2 - (R**2)[:, np.newaxis])
+
+    # no residuals where the group could not be fit, see m1_algebraic_batch
+    fit = ~np.isnan(R)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rms = np.sqrt(np.einsum('ij,ij->i', w_fit, res0**2) / w_fit.sum(axis=1))
+
+    fits = pd.DataFrame({'xc': xc,
+                         'yc': yc,
+                         'r': R,
+                         'residu': np.where(fit, np.sum(res0**2, axis=1), np.nan),
+                         'residu2': np.where(fit, np.sum(sq0**2, axis=1), np.nan),
+                         'rms': np.where(fit, rms, np.nan),
+                         'n': n},
+                        index=groups.size().index)
+
+    residuals = pd.Series(res[codes, position], index=df.index, name='residual')
+
+    return fits, residuals
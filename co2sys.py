@@ -6,6 +6,7 @@ Created on Fri Mar 24 2017
 co2sys methods
 """
 
+import numpy as np
 import pandas as pd
 
 
@@ -45,3 +46,276 @@ def parse_excel_csv_output(_f):
     names, units = zip(*names_units)
 
     return units, pd.read_csv(_f, names=names, header=0)
+
+
+def _constants(sss, sst):
+    """Equilibrium constants and total concentrations at 1 atm, using the
+    co2sys.xls settings recommended in qc.co2sys_xls_export:
+        K1, K2 from Lueker et al. 2000
+        KHSO4 from Dickson 1990
+        [B]T from Uppstrom 1974
+        pH on the Total scale (mol/kg-SW)
+    KF is Dickson and Riley 1979, KW Millero 1995, KP and KSi Yao and
+    Millero 1995, K0 and the fugacity factor Weiss 1974, KCa and KAr
+    Mucci 1983.
+
+    Parameters
+    ----------
+    sss : array-like, salinity in PSU
+    sst : array-like, temperature in degrees C
+
+    Returns
+    -------
+    dict of arrays, constants on the Total scale in mol/kg-SW
+    """
+
+    s = np.asarray(sss, dtype=float)
+    tk = np.asarray(sst, dtype=float) + 273.15
+    sqrt_s = np.sqrt(s)
+    log_tk = np.log(tk)
+    ion_s = 19.924 * s / (1000.0 - 1.005 * s)
+    sqrt_ion_s = np.sqrt(ion_s)
+    h2o_to_sw = 1.0 - 0.001005 * s
+
+    c = {}
+
+    # total concentrations, mol/kg-SW
+    c['TB'] = 0.0004157 * s / 35.0
+    c['TS'] = (0.14 / 96.062) * (s / 1.80655)
+    c['TF'] = (0.000067 / 18.998) * (s / 1.80655)
+    c['Ca'] = (0.02128 / 40.087) * (s / 1.80655)
+
+    # free scale
+    c['KS'] = np.exp(-4276.1 / tk + 141.328 - 23.093 * log_tk
+                     + (-13856.0 / tk + 324.57 - 47.986 * log_tk) * sqrt_ion_s
+                     + (35474.0 / tk - 771.54 + 114.723 * log_tk) * ion_s
+                     + (-2698.0 / tk) * sqrt_ion_s * ion_s
+                     + (1776.0 / tk) * ion_s ** 2) * h2o_to_sw
+    c['KF'] = np.exp(1590.2 / tk - 12.641 + 1.525 * sqrt_ion_s) * h2o_to_sw
+
+    free_to_tot = 1.0 + c['TS'] / c['KS']
+    sws_to_tot = free_to_tot / (1.0 + c['TS'] / c['KS'] + c['TF'] / c['KF'])
+    c['free_to_tot'] = free_to_tot
+
+    tk100 = tk / 100.0
+    c['K0'] = np.exp(-60.2409 + 93.4517 / tk100 + 23.3585 * np.log(tk100)
+                     + s * (0.023517 - 0.023656 * tk100 + 0.0047036 * tk100 ** 2))
+
+    # virial coefficients for the fugacity factor, 1 atm in bar, R in cm3 bar / mol K
+    b = -1636.75 + 12.0408 * tk - 0.0327957 * tk ** 2 + 3.16528e-5 * tk ** 3
+    delta = 57.7 - 0.118 * tk
+    c['fug_fac'] = np.exp((b + 2.0 * delta) * 1.01325 / (83.1451 * tk))
+
+    c['K1'] = 10.0 ** -(3633.86 / tk - 61.2172 + 9.6777 * log_tk
+                        - 0.011555 * s + 0.0001152 * s ** 2)
+    c['K2'] = 10.0 ** -(471.78 / tk + 25.929 - 3.16967 * log_tk
+                        - 0.01781 * s + 0.0001122 * s ** 2)
+
+    c['KB'] = np.exp((-8966.9 - 2890.53 * sqrt_s - 77.942 * s
+                      + 1.728 * sqrt_s * s - 0.0996 * s ** 2) / tk
+                     + 148.0248 + 137.1942 * sqrt_s + 1.62142 * s
+                     + (-24.4344 - 25.085 * sqrt_s - 0.2474 * s) * log_tk
+                     + 0.053105 * sqrt_s * tk)
+
+    # seawater scale converted to total
+    c['KW'] = np.exp(148.9802 - 13847.26 / tk - 23.6521 * log_tk
+                     + (-5.977 + 118.67 / tk + 1.0495 * log_tk) * sqrt_s
+                     - 0.01615 * s) * sws_to_tot
+    c['KP1'] = np.exp(-4576.752 / tk + 115.54 - 18.453 * log_tk
+                      + (-106.736 / tk + 0.69171) * sqrt_s
+                      + (-0.65643 / tk - 0.01844) * s) * sws_to_tot
+    c['KP2'] = np.exp(-8814.715 / tk + 172.1033 - 27.927 * log_tk
+                      + (-160.34 / tk + 1.3566) * sqrt_s
+                      + (0.37335 / tk - 0.05778) * s) * sws_to_tot
+    c['KP3'] = np.exp(-3070.75 / tk - 18.126
+                      + (17.27039 / tk + 2.81197) * sqrt_s
+                      + (-44.99486 / tk - 0.09984) * s) * sws_to_tot
+    c['KSi'] = np.exp(-8904.2 / tk + 117.4 - 19.334 * log_tk
+                      + (-458.79 / tk + 3.5913) * sqrt_ion_s
+                      + (188.74 / tk - 1.5998) * ion_s
+                      + (-12.1652 / tk + 0.07871) * ion_s ** 2) * h2o_to_sw * sws_to_tot
+
+    log10_tk = np.log10(tk)
+    c['KCa'] = 10.0 ** (-171.9065 - 0.077993 * tk + 2839.319 / tk + 71.595 * log10_tk
+                        + (-0.77712 + 0.0028426 * tk + 178.34 / tk) * sqrt_s
+                        - 0.07711 * s + 0.0041249 * sqrt_s * s)
+    c['KAr'] = 10.0 ** (-171.945 - 0.077993 * tk + 2903.293 / tk + 71.595 * log10_tk
+                        + (-0.068393 + 0.0017276 * tk + 88.135 / tk) * sqrt_s
+                        - 0.10018 * s + 0.0059415 * sqrt_s * s)
+
+    return c
+
+
+def _non_carbonate_alk(h, c, total_p, total_si):
+    """Alkalinity from everything but the carbonate species, minus
+    the free hydrogen, HSO4 and HF terms, all in mol/kg-SW"""
+
+    b_alk = c['TB'] * c['KB'] / (c['KB'] + h)
+    oh = c['KW'] / h
+    kp12 = c['KP1'] * c['KP2']
+    kp123 = kp12 * c['KP3']
+    p_alk = total_p * (kp12 * h + 2.0 * kp123 - h ** 3) / (h ** 3 + c['KP1'] * h ** 2 + kp12 * h + kp123)
+    si_alk = total_si * c['KSi'] / (c['KSi'] + h)
+    h_free = h / c['free_to_tot']
+    hso4 = c['TS'] / (1.0 + c['KS'] / h_free)
+    hf = c['TF'] / (1.0 + c['KF'] / h_free)
+    return b_alk + oh + p_alk + si_alk - h_free - hso4 - hf, b_alk, oh
+
+
+def _solve_ph(alk, slope, shape, tol=1e-8, max_iter=100):
+    """Newton iteration on pH for every row at once, as in CO2SYS
+
+    Parameters
+    ----------
+    alk : function of h, returns (residual, slope terms) in mol/kg-SW
+    slope : function of h and the terms from alk, returns d(TA)/d(pH)
+    shape : tuple, shape of the output array
+    tol : float, pH convergence tolerance
+    max_iter : int, iteration limit
+
+    Returns
+    -------
+    array of float, pH on the Total scale
+    """
+
+    ph = np.full(shape, 8.0)
+    for _ in range(max_iter):
+        h = 10.0 ** -ph
+        residual, terms = alk(h)
+        delta = residual / slope(h, terms)
+        # keep the step bounded so the first iterations cannot overshoot
+        while np.any(np.abs(delta) > 1):
+            delta = np.where(np.abs(delta) > 1, delta / 2.0, delta)
+        ph = ph + delta
+        if np.all(~(np.abs(delta) >= tol)):
+            break
+    return ph
+
+
+def _ph_from_ta_tc(ta, tc, c, total_p, total_si):
+    """pH on the Total scale from TA and TCO2, both in mol/kg-SW"""
+
+    def alk(h):
+        denom = h ** 2 + c['K1'] * h + c['K1'] * c['K2']
+        carb_alk = tc * c['K1'] * (h + 2.0 * c['K2']) / denom
+        other, b_alk, oh = _non_carbonate_alk(h, c, total_p, total_si)
+        return ta - carb_alk - other, (denom, b_alk, oh)
+
+    def slope(h, terms):
+        denom, b_alk, oh = terms
+        return np.log(10) * (tc * c['K1'] * h * (h ** 2 + c['K1'] * c['K2'] + 4.0 * h * c['K2']) / denom ** 2
+                             + b_alk * h / (c['KB'] + h) + oh + h)
+
+    return _solve_ph(alk, slope, np.broadcast(ta, tc, c['K1']).shape)
+
+
+def _fco2_from_tc_ph(tc, ph, c):
+    """fCO2 in atm from TCO2 in mol/kg-SW and pH on the Total scale"""
+
+    h = 10.0 ** -ph
+    return tc * h ** 2 / (h ** 2 + c['K1'] * h + c['K1'] * c['K2']) / c['K0']
+
+
+def carbonate_system(ta, pco2, sss, sst, total_p=0, total_si=0):
+    """Solve the carbonate system from TA and pCO2 at the sea surface,
+    vectorized over all values at once.  Replaces the co2sys.xls round
+    trip of qc.co2sys_xls_export and parse_excel_csv_output, see
+    _constants for the constants used.
+
+    Parameters
+    ----------
+    ta : array-like, total alkalinity in umol/kg-SW
+    pco2 : array-like, pCO2 in uatm
+    sss : array-like, salinity in PSU
+    sst : array-like, temperature in degrees C
+    total_p : array-like, total phosphate in umol/kg-SW
+    total_si : array-like, total silicate in umol/kg-SW
+
+    Returns
+    -------
+    dict of arrays with keys:
+        pH_out : pH on the Total scale
+        fco2_out : fCO2 in uatm
+        tco2_out : TCO2 in umol/kg-SW
+        hco3_out : HCO3 in umol/kg-SW
+        co3_out : CO3 in umol/kg-SW
+        co2_out : CO2* in umol/kg-SW
+        b_alk_out : borate alkalinity in umol/kg-SW
+        oh_out : OH in umol/kg-SW
+        revelle_out : Revelle factor
+        wca_out : calcite saturation state
+        war_out : aragonite saturation state
+    """
+
+    c = _constants(sss, sst)
+    ta = np.asarray(ta, dtype=float) * 1e-6
+    total_p = np.asarray(total_p, dtype=float) * 1e-6
+    total_si = np.asarray(total_si, dtype=float) * 1e-6
+
+    fco2 = np.asarray(pco2, dtype=float) * 1e-6 * c['fug_fac']
+    co2 = c['K0'] * fco2
+
+    def alk(h):
+        hco3 = c['K1'] * co2 / h
+        co3 = c['K2'] * hco3 / h
+        other, b_alk, oh = _non_carbonate_alk(h, c, total_p, total_si)
+        return ta - hco3 - 2.0 * co3 - other, (hco3, co3, b_alk, oh)
+
+    def slope(h, terms):
+        hco3, co3, b_alk, oh = terms
+        return np.log(10) * (hco3 + 4.0 * co3 + b_alk * h / (c['KB'] + h) + oh + h)
+
+    ph = _solve_ph(alk, slope, np.broadcast(ta, co2).shape)
+    h = 10.0 ** -ph
+    hco3 = c['K1'] * co2 / h
+    co3 = c['K2'] * hco3 / h
+    tc = co2 + hco3 + co3
+    _, b_alk, oh = _non_carbonate_alk(h, c, total_p, total_si)
+
+    # Revelle factor at constant TA by central difference in TCO2, as in CO2SYS
+    d_tc = 1e-6
+    fco2_plus = _fco2_from_tc_ph(tc + d_tc, _ph_from_ta_tc(ta, tc + d_tc, c, total_p, total_si), c)
+    fco2_minus = _fco2_from_tc_ph(tc - d_tc, _ph_from_ta_tc(ta, tc - d_tc, c, total_p, total_si), c)
+    revelle = (fco2_plus - fco2_minus) / (2.0 * d_tc) / (fco2 / tc)
+
+    return {'pH_out': ph,
+            'fco2_out': fco2 * 1e6,
+            'tco2_out': tc * 1e6,
+            'hco3_out': hco3 * 1e6,
+            'co3_out': co3 * 1e6,
+            'co2_out': co2 * 1e6,
+            'b_alk_out': b_alk * 1e6,
+            'oh_out': oh * 1e6,
+            'revelle_out': revelle,
+            'wca_out': co3 * c['Ca'] / c['KCa'],
+            'war_out': co3 * c['Ca'] / c['KAr']}
+
+
+def carbonate_dataframe(df, total_p=0, total_si=0):
+    """Solve the carbonate system for a whole deployment.
+    Assumes the same columns as qc.co2sys_xls_export:
+        'datetime64_ns',
+        'SSS',
+        'SST',
+        'TA',
+        'pCO2_SW_sat'
+
+    Parameters
+    ----------
+    df : Pandas DataFrame
+    total_p : float, total phosphate in umol/kg-SW
+    total_si : float, total silicate in umol/kg-SW
+
+    Returns
+    -------
+    Pandas DataFrame, input columns plus the outputs of carbonate_system,
+        rows with missing input are dropped
+    """
+
+    _df = df[['datetime64_ns', 'SSS', 'SST', 'TA', 'pCO2_SW_sat']].dropna(axis=0, how='any')
+
+    out = carbonate_system(ta=_df.TA.values, pco2=_df.pCO2_SW_sat.values,
+                           sss=_df.SSS.values, sst=_df.SST.values,
+                           total_p=total_p, total_si=total_si)
+
+    return _df.assign(**out)
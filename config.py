@@ -99,6 +99,16 @@ header_datetime_format = '%Y/%m/%d_%H:%M:%S'
 header_firmware_datetime_format = 'A.B_%m/%d/%Y'
 gps_datetime_format = '%Y/%m/%d_%H:%M:%S'  # converted from '%m/%d/%Y_%H:%M:%S' in datatypes.py
 
+# GPS QC flag codes and notes, see location.gps_std_filter
+gps_flag_ok = 2.0
+gps_flag_drift = 3.10
+gps_flag_time = 4.10
+gps_flag_off_station = 4.20
+gps_flag_notes = {gps_flag_ok: '',
+                  gps_flag_drift: 'Position std greater than max_std',
+                  gps_flag_time: 'Outside deployment start and end dates',
+                  gps_flag_off_station: 'Outside watch circle'}
+
 # repeat flag inserted where '000000' etc is found in data
 repeat_flag = '<repeat flag>'
 
@@ -119,6 +129,19 @@ cycles = ['zero_pump_on', 'zero_pump_off', 'zero_post_cal', 'span_pump_on',
           'span_pump_off', 'span_post_cal', 'equil_pump_on', 'equil_pump_off',
           'air_pump_on', 'air_pump_off']
 
+# abbreviated cycle names, in the order they are run and reported
+cycle_abbreviations = ['zpon', 'zpof', 'zpcl', 'spon', 'spof',
+                       'spcl', 'epon', 'epof', 'apon', 'apof']
+
+# Flash Data Format
+# interval between Licor samples recorded to flash, seconds
+flash_sample_interval = 2
+
+# first characters of the section delimiters within one flash co2 cycle,
+# in the order they are recorded
+flash_section_ids = ('Li', 'O2', 'RH', 'Rh')
+flash_section_names = ['li', 'o2', 'rh', 'rht']
+
 # times to ignore, these are default fillers
 time_ignore = ('0000/00/00 00:00:00', '00/00/0000_00:00:00')
 
@@ -172,6 +195,35 @@ samiph_header = ('location_code', 'system_code',
                  'unit_time', 'unit_unix_time', 'gps_time',
                  'lat', 'lon', 'firmware', 'mode', 'hex1', 'hex2')
 
+# SAMI2-pH type 0A hex record, see sami.py
+sami2_record_type = '0A'
+sami2_record_chars = 464  # hex characters after the '*' start character
+sami2_epoch = '1904-01-01'  # record time is seconds since
+sami2_n_ref = 16  # reference (blank) light measurements
+sami2_n_light = 92  # 23 sets of 434 nm and 578 nm reference and signal
+# mCP indicator molar absorptivities at 24.788 C, acid (a) and base (b) forms
+sami2_ea434 = 17533.
+sami2_eb434 = 2229.
+sami2_ea578 = 107.
+sami2_eb578 = 38502.
+
+# SeaFET Iridium frame, header line of date, time and number of samples
+# followed by mean and standard deviation of each value, see seafet.py
+seafet_datetime_format = '%m/%d/%Y %H:%M:%S'
+seafet_columns = ['ph_int', 'ph_int_std', 'ph_ext', 'ph_ext_std',
+                  'temp', 'temp_std',
+                  'v_int', 'v_int_std', 'v_ext', 'v_ext_std',
+                  'v_therm', 'v_therm_std', 'v_supply', 'v_supply_std',
+                  'i_supply', 'i_supply_std', 'humidity', 'humidity_std',
+                  'v_5v', 'v_5v_std', 'v_mbatt', 'v_mbatt_std']
+
+# Met frame values, the Met fields documented in engr_header, see met.py
+met_columns = engr_header[28][engr_header[28].index('EW_vector'):]
+
+# Met frame column names by number of values in the frame, other widths
+# are numbered 'met_0', 'met_1', ...
+met_frame_columns = {len(met_columns): met_columns}
+
 # This works with iridium data... imagine a place where there was ONE data spec...
 sbe16_columns_short = ['sst', 'sst_std',
                        'ssc', 'ssc_std',
@@ -497,7 +549,7 @@ xlsx_cycle_headers = ['mode',
 
 # cycle names for xlsx worksheets created using VBA
 cycle_names = {'Zero Pump On': 'zpon', 'Zero Pump Off': 'zpof', 'Zero Post Cal': 'zpcal',
-               'Span Pump On': 'zpon', 'Span Pump Off': 'spof', 'Span Post Cal': 'spcal',
+               'Span Pump On': 'spon', 'Span Pump Off': 'spof', 'Span Post Cal': 'spcal',
                'Equil Pump On': 'epon', 'Equil Pump Off': 'epof',
                'Air Pump On': 'apon', 'Air Pump Off': 'apof'}
 
@@ -522,6 +574,10 @@ sbe16_columns = ['datetime_v',
                  'SBE16_V_bat', 'SBE16_A_current',
                  'SBE16_n_samples']
 
+# SBE16 frame column names by number of values in the frame, see sstc.decode_sbe16
+sbe16_frame_columns = {len(sbe16_columns_short): sbe16_columns_short,
+                       len(sbe16_columns) - 1: sbe16_columns[1:]}
+
 # sheet names of MS Excel VBA sourced workbooks
 xls_sheet_names = ['Zero Pump On', 'Zero Pump Off', 'Zero Post Cal',
                    'Span Pump On', 'Span Pump Off', 'Span Post Cal',
@@ -530,8 +586,42 @@ xls_sheet_names = ['Zero Pump On', 'Zero Pump Off', 'Zero Post Cal',
 
 xls_merged_sheet = 'Merged'
 
-# Data type header IDs in Flash Data
-frame_data_types = ['mapco2', 'ph_sami', 'ph_seafet', 'sbe16', 'met']
+# Worksheet columns used to slice QC workbooks, see qc.xlsx_slices
+# slice name: (time sheet, time column, [(name, sheet, column), ...])
+xlsx_slice_columns = {'co2': ('Air Pump Off', 2,
+                              [('zpcl', 'Zero Post Cal', 23),     # xCO2 dry
+                               ('spcl', 'Span Post Cal', 23),     # xCO2 dry
+                               ('epof', 'Equil Pump Off', 25),    # xCO2 dry
+                               ('apof', 'Air Pump Off', 25),      # xCO2 dry
+                               ('epof_RH', 'Equil Pump Off', 13), # Relative Humidity
+                               ('apof_RH', 'Air Pump Off', 13),   # Relative Humidity
+                               ('v_logic', 'Zero Pump On', 28),
+                               ('v_trans', 'Zero Pump On', 29)]),
+                      'gps': ('Zero Pump On', 36,
+                              [('lat', 'Zero Pump On', 37),
+                               ('lon', 'Zero Pump On', 38)]),
+                      'pressure': ('Air Pump Off', 2,
+                                   [('zpon', 'Zero Pump On', 5),         # Licor kPa
+                                    ('spon', 'Span Pump On', 5),         # Licor kPa
+                                    ('epon', 'Equil Pump On', 5),        # Licor kPa
+                                    ('apon', 'Air Pump On', 5),          # Licor kPa
+                                    ('apof', 'Air Pump Off', 5),         # Licor kPa
+                                    ('epof_xco2', 'Equil Pump Off', 25), # xCO2 dry
+                                    ('apof_xco2', 'Air Pump Off', 25)]), # xCO2 dry
+                      'cal': ('Air Pump Off', 2,
+                              [('zpof', 'Zero Pump Off', 8),
+                               ('zpcal', 'Zero Post Cal', 8),
+                               ('spof', 'Span Pump Off', 8),
+                               ('spcal', 'Span Post Cal', 8),
+                               ('zpcal_raw1', 'Zero Post Cal', 17),
+                               ('zpcal_raw2', 'Zero Post Cal', 19),
+                               ('spcal_raw1', 'Span Post Cal', 17),
+                               ('spcal_raw2', 'Span Post Cal', 19),
+                               ('epof', 'Equil Pump Off', 8),
+                               ('apof', 'Air Pump Off', 8),
+                               ('zpon_licor_temp', 'Zero Pump On', 3),
+                               ('licor_zcof', 'Zero Pump On', 21),
+                               ('licor_scof', 'Zero Pump On', 22)])}
 
 # Number of lines to save if no end of frame line is found
 frame_default_number_of_list_lines = 30
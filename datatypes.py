@@ -5,9 +5,12 @@ Created on Wed Dec 14 09:41:25 2016
 @author: dietrich
 """
 
+import importlib
 import numpy as np
 import pandas as pd
 
+from collections import OrderedDict
+
 from . import config
 #import pyMAPCO2.config as config
 
@@ -444,6 +447,61 @@ class MAPCO2Engr(MAPCO2Base):
         return _a
 
 
+class FrameView(object):
+    """Read only view of lines [start:end] in a shared line buffer,
+    lines are only copied out of the buffer when the view is indexed
+
+    Parameters
+    ----------
+    buffer : list of str, cleaned data lines of one file
+    start : int, index of first line in buffer
+    end : int, index after last line in buffer
+    """
+
+    __slots__ = ('buffer', 'start', 'end')
+
+    def __init__(self, buffer, start, end):
+        self.buffer = buffer
+        self.start = max(int(start), 0)
+        self.end = max(min(int(end), len(buffer)), self.start)
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __iter__(self):
+        for n in range(self.start, self.end):
+            yield self.buffer[n]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            _start, _end, _step = i.indices(len(self))
+            if _step != 1:
+                return self.tolist()[i]
+            return FrameView(self.buffer, self.start + _start, self.start + _end)
+        if i < 0:
+            i += len(self)
+        if (i < 0) or (i >= len(self)):
+            raise IndexError('FrameView index out of range')
+        return self.buffer[self.start + i]
+
+    def __eq__(self, other):
+        return self.tolist() == list(other)
+
+    def __repr__(self):
+        return 'FrameView(%s:%s, %s lines)' % (self.start, self.end, len(self))
+
+    def index(self, value):
+        """Index of first occurrence of value, same as list.index"""
+        for n in range(self.start, self.end):
+            if self.buffer[n] == value:
+                return n - self.start
+        raise ValueError('%s is not in FrameView' % value)
+
+    def tolist(self):
+        """Copy lines out of the buffer into a new list"""
+        return self.buffer[self.start:self.end]
+
+
 class AuxData(object):
     def __init__(self, header=None, log=None):
 
@@ -461,7 +519,7 @@ class AuxData(object):
         Units: O2 = percent, RH = percent, RH Temp = deg C
         """
         self.header()
-        self.data = [float(n) / 100.0 for n in " ".join(self.raw[1:]).split(" ")]
+        self.data = aux_array(self.raw[1:])
 
     def header(self):
         """Extract header information from aux section,
@@ -477,11 +535,12 @@ class MetData(AuxData):
         super(AuxData, self).__init__()
 
     def extract(self):
-        print("MetData.extract>> raw:", self.raw)
-        pass
+        """Decode raw Met lines into a one row DataFrame, see met.decode_frames"""
+        self.data = aux_sensors['met'].parse_many([self.raw])
 
     def convert(self):
-        self.data = pd.DataFrame(data=None)
+        """Data is typed by extract"""
+        pass
 
 
 class SBE16Data(AuxData):
@@ -546,36 +605,196 @@ class SeaFETData(AuxData):
         self.data = pd.DataFrame(data=None)
 
 
+class AuxSensor(object):
+    """Frame delimiters and batch parser of one auxiliary sensor data type
+
+    Parameters
+    ----------
+    name : str, data type name, used for the 'name'_start, 'name'_end and
+        'name'_list columns of load.load_file
+    index_ids : tuple of str, first 4 characters of the line where a frame
+        of this data type starts, see load.index_data
+    delimiters : list of 2 str, start and end of the data section,
+        see load.frames
+    parser : str, 'module.function' of the batch parser, which takes a list
+        of blocks (list of lines) and returns a DataFrame with one row per
+        block.  Imported when first used.  None for a sensor that is only
+        indexed, parse_many then raises ValueError.
+    """
+
+    def __init__(self, name, index_ids, delimiters, parser=None):
+        self.name = name
+        self.index_ids = tuple(index_ids)
+        self.delimiters = list(delimiters)
+        self.parser = parser
+
+    def __repr__(self):
+        return 'AuxSensor(%s)' % self.name
+
+    def starts(self, line):
+        """True if line is the start delimiter of this data type"""
+        return line[0:len(self.delimiters[0])].lower() == self.delimiters[0].lower()
+
+    def ends(self, line):
+        """True if line is the end delimiter of this data type"""
+        return ((self.delimiters[1] != '') and
+                (line[0:len(self.delimiters[1])].lower() == self.delimiters[1].lower()))
+
+    def parse_many(self, blocks):
+        """Parse many blocks of this data type at once
+
+        Parameters
+        ----------
+        blocks : list of list of str, lines of each block
+
+        Returns
+        -------
+        Pandas DataFrame
+        """
+
+        if self.parser is None:
+            raise ValueError('AuxSensor %s was registered without a parser' % self.name)
+        module, function = self.parser.rsplit('.', 1)
+        module = importlib.import_module('.' + module, __package__)
+        return getattr(module, function)(blocks)
+
+
+# auxiliary sensors found in MAPCO2 frames, in index column order
+aux_sensors = OrderedDict()
+
+
+def register_aux(sensor):
+    """Add an auxiliary sensor to the registry, replacing any with the
+    same name
+
+    Parameters
+    ----------
+    sensor : AuxSensor
+
+    Returns
+    -------
+    AuxSensor
+    """
+
+    aux_sensors[sensor.name] = sensor
+    return sensor
+
+
+def frame_data_types():
+    """Names of all data types indexed in a MAPCO2 frame, MAPCO2 first"""
+    return ['mapco2'] + list(aux_sensors)
+
+
+register_aux(AuxSensor('ph_sami', ('Sami', 'PH'), ['PH', 'END PH'],
+                       'sami.decode_frames'))
+register_aux(AuxSensor('ph_seafet', ('Seaf',), ['Seafet Data', 'End Seafet Data'],
+                       'seafet.decode_frames'))
+register_aux(AuxSensor('sbe16', ('SBE1',), ['SBE16 DATA', 'END SBE16'],
+                       'sstc.decode_sbe16'))
+# note single whitespace - bad luck, full line is 'Met Data'
+register_aux(AuxSensor('met', ('Met ',), ['Met', ''],
+                       'met.decode_frames'))
+
+
 class LIData(AuxData):
 
-    def __init__(self):
-        super(AuxData, self).__init__()
+    def __init__(self, header=None, log=None):
+        super(LIData, self).__init__(header=header, log=log)
 
     def extract(self):
-        """Extract string list of """
+        """Extract (n, 5) array of int Licor samples"""
         self.header()
-        self.data = '  '.join(self.raw[1:]).split('  ')
+        self.data = li_array(self.raw[1:])
 
     def convert(self):
-        """Convert list of string lines to nested list of strings,
-         then to Pandas DataFrame, then convert from str(int (f x 100))
-         to float with 2 decimals.
-         """
-        self.data = [n.split(' ') for n in self.data]
-        # print(self.data)
-
-        if self.data[0][0] == '':
+        """Convert (n, 5) array of str(int (f x 100)) values to Pandas
+        DataFrame of float with 2 decimals and int raw values.
+        """
+
+        if len(self.data) == 0:
             self.data = pd.DataFrame(data=None)
-            self.log.append()
         else:
-            self.data = pd.DataFrame(self.data,
-                                     columns=["co2_ppm", "temp_c",
-                                              "press_kpa", "raw1", "raw2"])
-            self.data.co2_ppm = self.data.co2_ppm.astype(float) / 100.0
-            self.data.temp_c = self.data.temp_c.astype(float) / 100.0
-            self.data.press_kpa = self.data.press_kpa.astype(float) / 100.0
-            self.data.raw1 = self.data.raw1.astype(int)
-            self.data.raw2 = self.data.raw2.astype(int)
+            self.data = li_dataframe(self.data)
+
+
+def int_array(tokens):
+    """Convert str integer values to an int32 array in one call.
+    If any value cannot be converted or is too large for int32 the
+    result is float64, with NaN for values that cannot be converted.
+
+    Parameters
+    ----------
+    tokens : list of str, i.e. "2345"
+
+    Returns
+    -------
+    array of int32, or float64 if NaN filled
+    """
+
+    try:
+        return np.array(tokens, dtype=np.int32)
+    except (ValueError, OverflowError):
+        return pd.to_numeric(pd.Series(tokens, dtype=object),
+                             errors='coerce').values.astype(np.float64)
+
+
+def aux_array(lines):
+    """Convert lines of four character aux data to float, i.e.
+    "2345" to 23.45
+
+    Parameters
+    ----------
+    lines : list of str, whitespace delimited values
+
+    Returns
+    -------
+    array of float
+    """
+
+    return int_array(' '.join(lines).split()) / 100.0
+
+
+def li_array(lines):
+    """Convert lines of Licor samples to an (n, 5) array.  Samples are
+    5 whitespace delimited values, one or more samples per line.
+    Incomplete trailing samples are dropped.
+
+    Parameters
+    ----------
+    lines : list of str
+
+    Returns
+    -------
+    array of int32 (or float64 if NaN filled), shape (n, 5) with columns
+        co2 ppm x 100, temp C x 100, press kPa x 100, raw1, raw2
+    """
+
+    a = int_array(' '.join(lines).split())
+    n = len(a) // 5
+    return a[:n * 5].reshape(n, 5)
+
+
+def li_dataframe(a):
+    """Scale an (n, 5) Licor sample array to a DataFrame
+
+    Parameters
+    ----------
+    a : array, see li_array
+
+    Returns
+    -------
+    Pandas DataFrame with columns:
+        co2_ppm, temp_c, press_kpa : float
+        raw1, raw2 : int, or float if NaN filled
+    """
+
+    scaled = a[:, :3] / 100.0
+    return pd.DataFrame({'co2_ppm': scaled[:, 0],
+                         'temp_c': scaled[:, 1],
+                         'press_kpa': scaled[:, 2],
+                         'raw1': a[:, 3],
+                         'raw2': a[:, 4]},
+                        columns=['co2_ppm', 'temp_c', 'press_kpa', 'raw1', 'raw2'])
 
 
 class MAPCO2DataFinal(MAPCO2Base):
@@ -137,7 +137,7 @@ def format_time(_df):
     _df['year'] = _df.datetime64_ns.dt.year
     _df['dayofyear'] = _df.datetime64_ns.dt.dayofyear
     _df['time'] = _df.datetime64_ns.dt.time
-    _df['day'] = _df.datetime64_ns.apply(algebra.day_of_year)
+    _df['day'] = algebra.days_of_year(_df.datetime64_ns.values)
 
     return _df
 
@@ -372,7 +372,7 @@ def refactor(_df, verbose=False):
     _df['year'] = _df.datetime64_ns.dt.year
     _df['dayofyear'] = _df.datetime64_ns.dt.dayofyear
     _df['time'] = _df.datetime64_ns.dt.time
-    _df['day'] = _df.datetime64_ns.apply(algebra.day_of_year)
+    _df['day'] = algebra.days_of_year(_df.datetime64_ns.values)
     _df = format_floats(_df)
     _df.replace(to_replace=-999.0, value=np.nan, inplace=True)
 
@@ -4,10 +4,10 @@ Parse MAPCO2 flash data
 
 @author: Colin Dietrich
 """
+import numpy as np
 import pandas as pd
 
-import datatypes
-import parse
+from . import config, datatypes, load, parse
 
 
 def concat(data, start, end, verbose=False):
@@ -17,6 +17,9 @@ def concat(data, start, end, verbose=False):
             sections/samples of different data within the cycle
         auxiliary data
 
+    Note: this parses one frame at a time, see flash.batch for parsing
+    all frames of a file at once.
+
     Parameters
     ----------
     data : list,
@@ -26,83 +29,59 @@ def concat(data, start, end, verbose=False):
     """
 
     # break the data file into samples
-    frame = data[start[0]:end[0]]
+    sample = data[start[0]:end[0]]
 
     # first frame of data to initialize DataFrames and Panel
-    h_0, g_0, e_0, co2_0, aux_0, sbe16_0 = frame(sample=frame, verbose=verbose)
-
-    # print('h>>', g_0.date_time, h_0.system, h_0.date_time)
-    # print('h>>', h_0.data)
+    h_0, g_0, e_0, co2_0, aux_0, sbe16_0 = frame(sample=sample, verbose=verbose)
 
-    if g_0.date_time == 'NaT':
-        dt = h_0.date_time
+    if g_0.datetime_gps == 'NaT':
+        dt = h_0.datetime_mapco2
     else:
-        dt = g_0.date_time
+        dt = g_0.datetime_gps
 
     common_key = dt + '_' + h_0.system
-    # print('h common_key>>', common_key)
-
-    h = pd.DataFrame(data=[h_0.data], columns=h_0.data_names)
-    g = pd.DataFrame(data=[g_0.data], columns=g_0.data_names)
-    e = pd.DataFrame(data=[e_0.data], columns=e_0.data_names)
-    h['common_key'] = common_key
-    g['common_key'] = common_key
-    e['common_key'] = common_key
 
-    # print(h.head())
-    # print(g.head())
-    # print(e.head())
+    h = [h_0.data]
+    g = [g_0.data]
+    e = [e_0.data]
+    h_keys = [common_key]
 
-    co2 = co2_0
-    co2['common_key'] = common_key
+    co2_0['common_key'] = common_key
+    co2 = [co2_0]
 
-    # aux = pd.DataFrame(data=[aux.data], columns=aux.data_names)
     aux = [aux_0]
     sbe16 = [sbe16_0]
 
-    # TODO: break this out to use in IRIDIUM files and terminal dumps too!
-
     for n in range(1, len(start)):
         # break the data file into samples
-        frame = data[start[n]:end[n]]
-        h_n, g_n, e_n, co2_n_df, aux_n, sbe16_n = frame(sample=frame, verbose=verbose)
-        # print('co2_n df>>', co2_n.head())
-        # print('h>>', g_n.date_time, h_n.system, h_n.date_time)
-        # print('h>>', h_n.data)
-
-        if g_n.date_time == 'NaT':
-            dt = h_n.date_time
+        sample = data[start[n]:end[n]]
+        h_n, g_n, e_n, co2_n_df, aux_n, sbe16_n = frame(sample=sample, verbose=verbose)
+
+        if g_n.datetime_gps == 'NaT':
+            dt = h_n.datetime_mapco2
         else:
-            dt = g_n.date_time
+            dt = g_n.datetime_gps
 
         common_key = dt + '_' + h_n.system
-        # print('h common_key>>', common_key)
 
-        try:
-            h_n_df = pd.DataFrame(data=[h_n.data], columns=h_n.data_names)
-            g_n_df = pd.DataFrame(data=[g_n.data], columns=g_n.data_names)
-            e_n_df = pd.DataFrame(data=[e_n.data], columns=e_n.data_names)
-            h_n_df['common_key'] = common_key
-            g_n_df['common_key'] = common_key
-            e_n_df['common_key'] = common_key
-
-            h = pd.concat([h, h_n_df])
-            g = pd.concat([g, g_n_df])
-            e = pd.concat([e, e_n_df])
-        except:
-            # global_log.events.append('Error parsing aux data at:', common_key)
-            print('Error parsing aux data at:', common_key)
-        try:
-            # co2[common_key] = co2_n
-            co2_n_df['common_key'] = common_key
-            co2 = pd.concat([co2, co2_n_df])
-        except ValueError:
-            # print('parse.flash>> co2', co2.ix[-1])
-            # global_log.events.append('Error parsing co2 data at:', common_key)
-            print('Error parsing co2 data at:', common_key)
+        h.append(h_n.data)
+        g.append(g_n.data)
+        e.append(e_n.data)
+        h_keys.append(common_key)
+
+        co2_n_df['common_key'] = common_key
+        co2.append(co2_n_df)
         aux.append(aux_n)
         sbe16.append(sbe16_n)
 
+    h = pd.DataFrame(data=h, columns=h_0.data_names)
+    g = pd.DataFrame(data=g, columns=g_0.data_names)
+    e = pd.DataFrame(data=e, columns=e_0.data_names)
+    h['common_key'] = h_keys
+    g['common_key'] = h_keys
+    e['common_key'] = h_keys
+    co2 = pd.concat(co2)
+
     return h, g, e, co2, aux, sbe16
 
 
@@ -118,39 +97,25 @@ def frame(sample, verbose=False):
 
     h = parse.header(line=h, verbose=verbose)
     g = parse.gps(line=g, verbose=verbose)
-    g.timestamp = h.timestamp
     e = parse.engr(line=e, verbose=verbose, data_type='flash')
-    e.decode_flag()
-    e.timestamp = h.timestamp
+
+    timestamp = pd.to_datetime(h.datetime_mapco2,
+                               format=config.header_datetime_format)
+    g.timestamp = timestamp
+    e.timestamp = timestamp
 
     if verbose:
         print("frame header>>", h.data)
         print("frame gps>>", g.data)
         print("frame engineering>>", e.data)
-
-    print("parse.parse_flash>>ID INFO:", h.date_time + '_' + h.system)
+        print("flash.frame>>ID INFO:", h.datetime_mapco2 + '_' + h.system)
 
     co2, aux, sbe16 = flash_co2_aux(sample, header=h, verbose=verbose)
-    co2["timestamp"] = h.timestamp
+    co2["timestamp"] = timestamp
 
     return h, g, e, co2, aux, sbe16
 
 
-def clean_flash_line(line):
-    """Clean a line of flash data
-
-    Parameters
-    ----------
-    line : str
-
-    Returns
-    -------
-
-    """
-    if line == '':
-        pass
-
-
 def flash_cycle_id(line):
     """Identify what sort of data is in a flash data cycle header
     row that starts with '*****...'
@@ -158,19 +123,20 @@ def flash_cycle_id(line):
     ----------
     line : str, delimiter line of flash data
     """
-    line = line.split(' ')
+    line = line.split()
 
     if line[1] in ['Met', 'SBE16']:
         return 0, line[1]
     minute = int(line[-1])
     cycle = line[1] + '_' + line[-2]
 
+    # named the same as the iridium cycles
     names = {'Zero_on': 'zpon',
              'Zero_off': 'zpof',
-             'Zero_cal': 'zcal',
+             'Zero_cal': 'zpcl',
              'Span_on': 'spon',
              'Span_off': 'spof',
-             'Span_cal': 'scal',
+             'Span_cal': 'spcl',
              'Equil_on': 'epon',
              'Equil_off': 'epof',
              'Air_on': 'apon',
@@ -228,7 +194,7 @@ def flash_co2_aux(sample, header, verbose=False):
     met_df = None
     sbe16_df = None
 
-    i, m, c = frame(sample, verbose=False)
+    i, m, c = index_frame(sample, verbose=False)
     i_end = i[1:] + [len(sample)]
 
     if verbose:
@@ -237,14 +203,9 @@ def flash_co2_aux(sample, header, verbose=False):
         print("frame cycles, c>>", c)
         print("frame info lengths>> ", len(i), len(m), len(c))
 
-    cycle_0 = sample[i[0]:i_end[0]]
-    co2_container_0 = flash_single_cycle(cycle_0)
-
-    co2_container_0.data["cycle"] = c[0]
-
-    co2_df = co2_container_0.data
+    co2_list = []
 
-    for n in range(1, len(c)):
+    for n in range(0, len(c)):
 
         cycle = sample[i[n]:i_end[n]]
 
@@ -261,8 +222,14 @@ def flash_co2_aux(sample, header, verbose=False):
             if co2_df_n is None:
                 continue
             co2_df_n.data["cycle"] = c[n]
-            co2_df = pd.concat([co2_df, co2_df_n.data])
-            co2_df['n'] = co2_df.index
+            co2_df_n.data["minute"] = m[n]
+            co2_df_n.data["n"] = co2_df_n.data.index
+            co2_list.append(co2_df_n.data)
+
+    if len(co2_list) == 0:
+        co2_df = pd.DataFrame(data=None)
+    else:
+        co2_df = pd.concat(co2_list)
 
     return co2_df, met_df, sbe16_df
 
@@ -321,7 +288,7 @@ def flash_find_sections(cycle, verbose=False):
     for n in range(0, len(cycle)):
         if verbose:
             print(n, cycle[n][0:2])
-        if cycle[n][0:2] in ('Li', 'O2', 'RH', 'Rh', 'Met', 'SBE16', 'Seafet Data'):
+        if cycle[n][0:2] in config.flash_section_ids:
             indexes.append(n)
             names.append(cycle[n])
     indexes.append(len(cycle))
@@ -345,8 +312,8 @@ def flash_single_cycle(cycle, verbose=False):
     indexes_end = indexes[1:]
     indexes = indexes[:-1]
 
-    if len(indexes_end) == 0:
-            return None
+    if len(indexes_end) < 4:
+        return None
 
     if verbose:
         print("indexes (new)>> ", indexes)
@@ -364,29 +331,353 @@ def flash_single_cycle(cycle, verbose=False):
     cycle_out.extract()
     cycle_out.convert()
 
-    # if cycle_out.number > 1:
-    #     cycle_out.extract()
-    #     cycle_out.convert()
-
-    o2 = datatypes.AuxData()
-    o2.header()
-    if o2.number > 1 & len(cycle_out.data) > 0:
-        o2.raw = cycle_o2
-        o2.extract()
-        cycle_out.data["O2_percent"] = o2.data
-
-    rh = datatypes.AuxData()
-    rh.header()
-    if rh.number > 1 & len(cycle_out.data) > 0:
-        rh.raw = cycle_rh
-        rh.extract()
-        cycle_out.data["RH_percent"] = rh.data
-
-    rht = datatypes.AuxData()
-    rht.header()
-    if rht.number > 1 & len(cycle_out.data) > 0:
-        rht.raw = cycle_rht
-        rht.extract()
-        cycle_out.data["RH_temp_c"] = rht.data
+    n_samples = len(cycle_out.data)
+
+    for column, raw in (("O2_percent", cycle_o2),
+                        ("RH_percent", cycle_rh),
+                        ("RH_temp_c", cycle_rht)):
+        aux = datatypes.AuxData()
+        aux.raw = raw
+        aux.header()
+        if (aux.number > 1) and (n_samples > 0):
+            aux.extract()
+            # pad or trim to the number of Licor samples
+            _d = np.full(n_samples, np.nan)
+            _n = min(n_samples, len(aux.data))
+            _d[:_n] = aux.data[:_n]
+            cycle_out.data[column] = _d
 
     return cycle_out
+
+
+def index_file(data, verbose=False):
+    """Find all frame, cycle and section delimiters in a flash file in a
+    single pass over the lines
+
+    Parameters
+    ----------
+    data : list, str of each line from a flash file
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    frames : array of int, line index of each frame header
+    cycles : Pandas DataFrame, one row per '*****' delimited cycle with columns:
+        start : int, line index of the cycle delimiter
+        end : int, line index after the last line of the cycle
+        frame : int, position in frames of the frame holding the cycle
+        minute : int, minute the cycle was run
+        cycle : str, cycle name, see flash_cycle_id
+    sections : Pandas DataFrame, one row per Li/O2/RH/RHT section with columns:
+        start : int, line index of the section delimiter
+        end : int, line index after the last line of the section
+        cycle_i : int, position in cycles of the cycle holding the section
+        section : str, section name from config.flash_section_names
+    """
+
+    frame_i = []
+    cycle_i = []
+    minutes = []
+    cycles = []
+    section_i = []
+
+    for n, line in enumerate(data):
+        if line[0:4] in config.pco2_start_delimiters:
+            frame_i.append(n)
+        elif line[0:5] == '*****':
+            try:
+                m, c = flash_cycle_id(line)
+            except (IndexError, KeyError, ValueError):
+                if verbose:
+                    print('flash.index_file>> Unknown cycle at line:', n, line)
+                m, c = -1, ''
+            cycle_i.append(n)
+            minutes.append(m)
+            cycles.append(c)
+        elif line[0:2] in config.flash_section_ids:
+            section_i.append(n)
+
+    n_lines = len(data)
+    frame_i = np.array(frame_i, dtype=int)
+    cycle_i = np.array(cycle_i, dtype=int)
+    section_i = np.array(section_i, dtype=int)
+
+    # a cycle ends at the next cycle or frame delimiter
+    bounds = np.sort(np.concatenate([frame_i, cycle_i, [n_lines]]))
+    cycle_end = bounds[np.searchsorted(bounds, cycle_i, side='right')]
+
+    cycles = pd.DataFrame({'start': cycle_i,
+                           'end': cycle_end,
+                           'frame': np.searchsorted(frame_i, cycle_i, side='right') - 1,
+                           'minute': np.array(minutes, dtype=int),
+                           'cycle': cycles},
+                          columns=['start', 'end', 'frame', 'minute', 'cycle'])
+
+    # a section ends at the next section, cycle or frame delimiter
+    bounds = np.sort(np.concatenate([bounds, section_i]))
+    section_end = bounds[np.searchsorted(bounds, section_i, side='right')]
+    section_cycle = np.searchsorted(cycle_i, section_i, side='right') - 1
+
+    # drop sections outside of any cycle, i.e. aux data after the last cycle
+    keep = section_cycle >= 0
+    keep[keep] = section_i[keep] < cycle_end[section_cycle[keep]]
+    section_i = section_i[keep]
+    section_end = section_end[keep]
+    section_cycle = section_cycle[keep]
+
+    # position of each section within its cycle, Li, O2, RH then RHT
+    position = (np.arange(len(section_cycle)) -
+                np.searchsorted(section_cycle, section_cycle, side='left'))
+    names = np.array(config.flash_section_names + [''], dtype=object)
+    position = np.minimum(position, len(config.flash_section_names))
+
+    sections = pd.DataFrame({'start': section_i,
+                             'end': section_end,
+                             'cycle_i': section_cycle,
+                             'section': names[position]},
+                            columns=['start', 'end', 'cycle_i', 'section'])
+
+    return frame_i, cycles, sections
+
+
+def block_tokens(data, start, end, width=1):
+    """Split the lines of many sections of data into one flat list of tokens,
+    skipping the section delimiter line
+
+    Parameters
+    ----------
+    data : list, str of each line from a flash file
+    start : array-like of int, line index of each section delimiter
+    end : array-like of int, line index after the last line of each section
+    width : int, number of tokens per sample, partial samples are dropped
+
+    Returns
+    -------
+    tokens : list of str, all tokens of all sections
+    counts : array of int, number of samples in each section
+    """
+
+    tokens = []
+    counts = np.zeros(len(start), dtype=int)
+    for n, (s, e) in enumerate(zip(start, end)):
+        _t = ' '.join(data[s+1:e]).split()
+        _c = len(_t) // width
+        tokens.extend(_t[:_c * width])
+        counts[n] = _c
+    return tokens, counts
+
+
+def frame_headers(data, frame_i, system=None, verbose=False):
+    """Parse the header, gps and engineering lines of all frames
+
+    Parameters
+    ----------
+    data : list, str of each line from a flash file
+    frame_i : array-like of int, line index of each frame header
+    system : str, system identifier, if None the header system is used
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    h, g, e : Pandas DataFrames, formatted like iridium.batch_co2
+    valid : array of bool, True for frames that could be parsed
+    """
+
+    h_rows = []
+    g_rows = []
+    e_rows = []
+    valid = np.zeros(len(frame_i), dtype=bool)
+
+    h_names = g_names = e_names = None
+
+    for n, i in enumerate(frame_i):
+        try:
+            _h = parse.header(data[i], verbose=verbose)
+            _g = parse.gps(data[i+1], verbose=verbose)
+            _e = parse.engr(data[i+2], verbose=verbose,
+                            data_type='flash', firmware=_h.firmware)
+        except (IndexError, ValueError):
+            print('Error parsing frame header at line:', i)
+            continue
+        h_rows.append(_h.data)
+        g_rows.append(_g.data)
+        e_rows.append(_e.data)
+        h_names, g_names, e_names = _h.data_names, _g.data_names, _e.data_names
+        valid[n] = True
+
+    if h_names is None:
+        h_names = datatypes.MAPCO2Header().data_names
+        g_names = datatypes.MAPCO2GPS().data_names
+        e_names = datatypes.MAPCO2Engr(data_type='flash').data_names
+
+    h = pd.DataFrame(data=h_rows, columns=h_names)
+    g = pd.DataFrame(data=g_rows, columns=g_names)
+    e = pd.DataFrame(data=e_rows, columns=e_names)
+
+    h['datetime64_ns_mapco2'] = pd.to_datetime(h.datetime_mapco2,
+                                               format=config.header_datetime_format,
+                                               errors='coerce')
+    if system is not None:
+        h['system'] = str(system)
+
+    common_key = (h.system + '_' +
+                  h.datetime64_ns_mapco2.dt.floor('30min').dt.strftime(config.iso_strftime_utc))
+
+    h['common_key'] = common_key.values
+    g['common_key'] = common_key.values
+    e['common_key'] = common_key.values
+
+    gps_time = g.datetime_gps.astype(str)
+    g['datetime_gps'] = np.where(gps_time.str[0:4] == '0000',
+                                 h.datetime_mapco2, gps_time)
+    g['datetime64_ns_gps'] = pd.to_datetime(g.datetime_gps,
+                                            format=config.gps_datetime_format,
+                                            errors='coerce')
+    e['datetime64_ns_engr'] = h.datetime64_ns_mapco2.values
+
+    return h, g, e, valid
+
+
+def batch(data, system=None, verbose=False):
+    """Parse all frames of a flash file at once.  Cycle delimiters are indexed
+    in one pass, then the Li, O2, RH and RHT sections of all cycles are
+    converted to columnar arrays together.
+
+    Parameters
+    ----------
+    data : list, str of each line from a flash file, stripped of whitespace
+    system : str, system identifier, if None the header system is used
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    h, g, e : Pandas DataFrames, one row per frame, formatted
+        like iridium.batch_co2
+    co2 : Pandas DataFrame, one row per Licor sample with columns:
+        cycle_n, cycle, minute, n, licor_temp, licor_press, xCO2, O2, RH,
+        RH_temp, xCO2_raw1, xCO2_raw2, common_key, system, datetime_str,
+        datetime64_ns, datetime64_ns_sample
+    """
+
+    frame_i, cycles, sections = index_file(data, verbose=verbose)
+
+    h, g, e, valid = frame_headers(data, frame_i, system=system, verbose=verbose)
+
+    # position of each frame in h, g and e, -1 if it could not be parsed
+    frame_n = np.where(valid, np.cumsum(valid) - 1, -1)
+    cycle_frame = np.where(cycles.frame.values >= 0,
+                           frame_n[np.maximum(cycles.frame.values, 0)], -1)
+    co2_cycle = (cycle_frame >= 0) & cycles.cycle.isin(config.cycle_abbreviations).values
+
+    # Licor samples, 5 values per sample
+    li = sections[(sections.section == 'li') & co2_cycle[sections.cycle_i.values]]
+    tokens, li_n = block_tokens(data, li.start.values, li.end.values, width=5)
+    li_values = datatypes.int_array(tokens).reshape(-1, 5)
+    li_scaled = li_values[:, :3] / 100.0
+
+    n_rows = len(li_values)
+    row_cycle = np.repeat(li.cycle_i.values, li_n)
+    li_offset = np.cumsum(li_n) - li_n
+    row_n = np.arange(n_rows) - np.repeat(li_offset, li_n)
+
+    co2 = pd.DataFrame({'cycle': cycles.cycle.values[row_cycle],
+                        'minute': cycles.minute.values[row_cycle],
+                        'n': row_n,
+                        'licor_temp': li_scaled[:, 1],
+                        'licor_press': li_scaled[:, 2],
+                        'xCO2': li_scaled[:, 0]},
+                       columns=['cycle', 'minute', 'n',
+                                'licor_temp', 'licor_press', 'xCO2'])
+    co2.insert(0, 'cycle_n', co2.cycle.map({c: n for n, c in
+                                            enumerate(config.cycle_abbreviations)}))
+
+    # O2, RH and RH temperature, 1 value per Licor sample
+    cycle_li_n = np.zeros(len(cycles), dtype=int)
+    cycle_li_n[li.cycle_i.values] = li_n
+    cycle_li_offset = np.zeros(len(cycles), dtype=int)
+    cycle_li_offset[li.cycle_i.values] = li_offset
+
+    for name, column in (('o2', 'O2'), ('rh', 'RH'), ('rht', 'RH_temp')):
+        aux = sections[(sections.section == name) & co2_cycle[sections.cycle_i.values]]
+        tokens, aux_n = block_tokens(data, aux.start.values, aux.end.values)
+        values = datatypes.int_array(tokens) / 100.0
+        # align each value with the Licor sample of the same cycle and index,
+        # values without a matching Licor sample are dropped
+        aux_cycle = np.repeat(aux.cycle_i.values, aux_n)
+        aux_pos = np.arange(len(values)) - np.repeat(np.cumsum(aux_n) - aux_n, aux_n)
+        keep = aux_pos < cycle_li_n[aux_cycle]
+        out = np.full(n_rows, np.nan)
+        out[cycle_li_offset[aux_cycle[keep]] + aux_pos[keep]] = values[keep]
+        co2[column] = out
+
+    co2['xCO2_raw1'] = li_values[:, 3]
+    co2['xCO2_raw2'] = li_values[:, 4]
+
+    row_frame = cycle_frame[row_cycle]
+    co2['common_key'] = h.common_key.values[row_frame]
+    co2['system'] = h.system.values[row_frame]
+    co2['datetime_str'] = h.datetime_mapco2.values[row_frame]
+    co2['datetime64_ns'] = h.datetime64_ns_mapco2.values[row_frame]
+    co2['datetime64_ns_sample'] = (co2.datetime64_ns +
+                                   pd.to_timedelta(co2.minute, unit='m') +
+                                   pd.to_timedelta(co2.n * config.flash_sample_interval,
+                                                   unit='s'))
+
+    co2.drop_duplicates(subset=['cycle', 'n', 'datetime64_ns', 'system'], inplace=True)
+    co2.reset_index(drop=True, inplace=True)
+
+    if verbose:
+        print('flash.batch>> frames:', len(h), 'cycles:', len(cycles),
+              'samples:', len(co2))
+
+    return h, g, e, co2
+
+
+def load_file(f, system=None, clean=False, verbose=False):
+    """Load and parse all frames in one flash data file
+
+    Parameters
+    ----------
+    f : str, filepath to file to parse
+    system : str, system identifier, if None the header system is used
+    clean : bool, run load.cleaner on the lines (slow), otherwise
+        only whitespace is stripped
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    h, g, e, co2 : Pandas DataFrames, see flash.batch
+    """
+
+    data = load.file_to_list(f)
+    if clean:
+        data, _, _ = load.cleaner(data_list=data)
+    else:
+        data = [line.strip() for line in data]
+    return batch(data, system=system, verbose=verbose)
+
+
+def load_window(f, t_start=None, t_end=None, system=None, rebuild_index=False,
+                verbose=False):
+    """Load and parse only the frames of a flash data file within a time
+    window.  Frames are read directly using the file's sidecar '.idx'
+    index, see load.frame_index.
+
+    Parameters
+    ----------
+    f : str, filepath to file to parse
+    t_start : datetime-like, start of window (inclusive), None for no limit
+    t_end : datetime-like, end of window (inclusive), None for no limit
+    system : str, system identifier, if None the header system is used
+    rebuild_index : bool, force the frame index to be rebuilt
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    h, g, e, co2 : Pandas DataFrames, see flash.batch
+    """
+
+    index = load.frame_index(f, rebuild=rebuild_index, verbose=verbose)
+    data = load.read_frames(f, index=index, t_start=t_start, t_end=t_end)
+    data = [line.strip() for line in data]
+    return batch(data, system=system, verbose=verbose)
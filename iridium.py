@@ -10,6 +10,7 @@ import pandas as pd
 
 from . import config
 from . import datatypes
+from . import load
 from . import parse
 from .algebra import common_key
 
@@ -69,7 +70,8 @@ def frame_co2(sample, system, verbose=False):
 
     Parameters
     ----------
-    sample : list of string data containg frame of co2 data
+    sample : list of string data containg frame of co2 data, or
+        datatypes.FrameView of the same lines
     system : str, type of data source and serial number for data identification
     verbose : bool, print debug statements
 
@@ -188,6 +190,7 @@ def batch_co2(df, verbose=False):
     df : Pandas DataFrame, with list data and datatype columns
         list_data : list of str, co2 data lines
         datatype : str, datatype of co2 imported see irdium.frame_co2 for details
+        or offset columns from load.load_file(offsets=True)
     verbose : bool, print debug statements
 
     Returns
@@ -195,19 +198,63 @@ def batch_co2(df, verbose=False):
     h, g, e, co2 : Pandas DataFrames
     """
 
-    data_list = df.co2_list
-    system = df.system
+    data_list = co2_data(df)
+    system = df.system.values
     if verbose:
         print(len(data_list[0]))
 
-    h, g, e, co2 = frame_co2(data_list[0], system[0], verbose=verbose)
+    return co2_frames(data_list, system, verbose=verbose)
+
+
+def co2_data(df):
+    """Get co2 frame lines from a DataFrame returned by load.load_file,
+    either the copied line lists or lazy views of the line buffer
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, from load.load_file or load.file_batch
+
+    Returns
+    -------
+    array-like of list of str or datatypes.FrameView
+    """
+
+    if 'co2_list' in df.columns:
+        return df.co2_list.values
+
+    return load.frame_views(df, 'co2')
 
-    for n in range(1, len(data_list)):
-        h_n, g_n, e_n, co2_n = frame_co2(data_list[n], system[n], verbose=verbose)
-        h = pd.concat([h, h_n])
-        g = pd.concat([g, g_n])
-        e = pd.concat([e, e_n])
-        co2 = pd.concat([co2, co2_n])
+
+def co2_frames(data_list, system, verbose=False):
+    """Parse co2 frames and concatenate the results once
+
+    Parameters
+    ----------
+    data_list : array-like of list of str or datatypes.FrameView,
+        co2 data lines of each frame
+    system : array-like of str, system of each frame
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    h, g, e, co2 : Pandas DataFrames
+    """
+
+    h, g, e, co2 = [], [], [], []
+    for sample, _system in zip(data_list, system):
+        h_n, g_n, e_n, co2_n = frame_co2(sample, _system, verbose=verbose)
+        h.append(h_n)
+        g.append(g_n)
+        e.append(e_n)
+        co2.append(co2_n)
+
+    h = pd.concat(h)
+    g = pd.concat(g)
+    e = pd.concat(e)
+    co2 = pd.concat(co2)
+
+    if len(co2) == 0:
+        return h, g, e, co2
 
     co2.drop_duplicates(subset=['cycle', 'datetime64_ns', 'system'], inplace=True)
 
@@ -216,12 +263,71 @@ def batch_co2(df, verbose=False):
     return h, g, e, co2
 
 
+def iter_co2(df_or_files, chunk_frames=1000, datatype='m', verbose=False):
+    """Generator version of batch_co2 that parses frames in chunks, so
+    only one chunk of raw lines and parsed data is held in memory at once.
+    Duplicate co2 frames are removed across chunks, as in batch_co2.
+
+    Parameters
+    ----------
+    df_or_files : Pandas DataFrame from load.load_file or load.file_batch,
+        or list of str filepaths to load one at a time with load.load_file
+    chunk_frames : int, number of frames to parse per chunk
+    datatype : str or list of str, system type(s) passed to load.load_file
+        when df_or_files is a list of filepaths
+    verbose : bool, print debug statements
+
+    Yields
+    ------
+    h, g, e, co2 : Pandas DataFrames for chunk_frames or fewer frames
+    """
+
+    def sources():
+        if isinstance(df_or_files, pd.DataFrame):
+            yield co2_data(df_or_files), df_or_files.system.values
+            return
+        if isinstance(datatype, str):
+            datatypes_in = [datatype] * len(df_or_files)
+        else:
+            datatypes_in = datatype
+        for f, d in zip(df_or_files, datatypes_in):
+            _df = load.load_file(f=f, datatype=d, offsets=True, verbose=verbose)
+            if len(_df) == 0:
+                continue
+            yield co2_data(_df), _df.system.values
+
+    seen = set()
+
+    def chunk(data_list, system):
+        h, g, e, co2 = co2_frames(data_list, system, verbose=verbose)
+        if len(co2) > 0:
+            keys = list(zip(co2.datetime64_ns, co2.system))
+            co2 = co2[[k not in seen for k in keys]]
+            seen.update(keys)
+        return h, g, e, co2
+
+    buffer_data = []
+    buffer_system = []
+    for data_list, system in sources():
+        buffer_data.extend(data_list)
+        buffer_system.extend(system)
+        while len(buffer_data) >= chunk_frames:
+            if verbose:
+                print('iridium.iter_co2>> Parsing chunk of', chunk_frames, 'frames')
+            yield chunk(buffer_data[:chunk_frames], buffer_system[:chunk_frames])
+            del buffer_data[:chunk_frames]
+            del buffer_system[:chunk_frames]
+
+    if len(buffer_data) > 0:
+        yield chunk(buffer_data, buffer_system)
+
+
 def frame(sample, verbose=False, ph=False):
     """Handle one frame of data
 
     Parameters
     ----------
-    sample : list of str, cleaned data from MAPCO2
+    sample : list of str or datatypes.FrameView, cleaned data from MAPCO2
     verbose : bool, print debug statements
     pH : bool, whether to process pH data found in Iridium data
 
@@ -289,8 +395,8 @@ def frame(sample, verbose=False, ph=False):
     data_template = datatypes.MAPCO2Data()
 
     _co2 = pd.DataFrame(data=[zpon, zpof, zpcl, spon, spof, spcl, epon, epof,
-                              apon, apof], columns=['cycle']+data_template.data_names,
-                        dtype=float)
+                              apon, apof], columns=['cycle']+data_template.data_names)
+    _co2[data_template.data_names] = _co2[data_template.data_names].astype(float)
 
     _co2['common_key'] = common_key
     _co2['system'] = h.system[0]
@@ -302,35 +408,64 @@ def frame(sample, verbose=False, ph=False):
     if verbose:
         print(_co2.head())
 
-    # handle sstc and ph data
-    sbe16_i, ph_i = index_frame(sample)
+    # handle auxiliary sensor data, see datatypes.aux_sensors
+    aux_blocks = index_aux(sample)
 
     if verbose:
-        print('sbe16_i>>', sbe16_i)
-        print('ph_i>>', ph_i)
-
-    if len(sbe16_i) == 2:
-        sbe16 = datatypes.SBE16Data()
-        sbe16.raw = sample[sbe16_i[0]:sbe16_i[1]]
-        
-    if len(ph_i) == 2:
-        # TODO: Seafet data handler
-        ph = datatypes.SAMI2Data()
-        ph.raw = sample[ph_i[0]:ph_i[1]]
-        ph.extract()
-        if ph.data is not None:
-            phdf = pd.DataFrame({'hex': ph.data, 'index': list(range(0, len(ph.data)))})
-        else:
-            phdf = pd.DataFrame({})
-    else:
-        phdf = pd.DataFrame({})
-        
-    sbe16 = pd.DataFrame({})
+        print('aux_blocks>>', aux_blocks)
+
+    parsed = {}
+    for name, block in aux_blocks.items():
+        sensor = datatypes.aux_sensors[name]
+        if sensor.parser is None:
+            continue
+        _df = sensor.parse_many([block])
+        _df['common_key'] = common_key
+        parsed[name] = _df
+
+    sbe16 = parsed.pop('sbe16', pd.DataFrame({}))
+    phdf = parsed.pop('ph_sami', pd.DataFrame({}))
+
+    # remaining sensors have one row per frame
     aux = pd.DataFrame({})
+    for _df in parsed.values():
+        aux = _df if len(aux) == 0 else aux.merge(_df, on='common_key')
 
     return h, g, e, _co2, aux, sbe16, phdf
 
 
+def index_aux(data):
+    """Find the block of lines of each auxiliary sensor in one frame,
+    in one pass using the delimiters in datatypes.aux_sensors
+
+    Parameters
+    ----------
+    data : list, str of each line from flash file in this frame
+
+    Returns
+    -------
+    dict, sensor name: lines from start to end delimiter inclusive,
+        to the end of data if the sensor has no end delimiter
+    """
+
+    sensors = list(datatypes.aux_sensors.values())
+
+    start = {}
+    blocks = {}
+    for n in range(0, len(data)):
+        for sensor in sensors:
+            if sensor.ends(data[n]) and (sensor.name in start):
+                blocks[sensor.name] = data[start.pop(sensor.name):n+1]
+            elif sensor.starts(data[n]):
+                start[sensor.name] = n
+
+    for name, n in start.items():
+        if datatypes.aux_sensors[name].delimiters[1] == '':
+            blocks[name] = data[n:]
+
+    return blocks
+
+
 def index_frame(data, verbose=False):
     """Find delimiters between cycles
 
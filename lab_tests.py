@@ -12,7 +12,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 
-from . import scrape, load, iridium, config, plot_plt, algebra, physics
+from . import scrape, load, iridium, config, plot_plt, algebra, physics, utils
 
 
 def dry(row):
@@ -26,6 +26,51 @@ def dry(row):
         return np.nan
 
 
+def benchmark_dry(n=100000):
+    """Compare the row apply path for dry xCO2 with the vectorized
+    physics equations and the fused physics.xco2_dry_from_cycles
+
+    Parameters
+    ----------
+    n : int, number of random cycles
+
+    Returns
+    -------
+    Pandas Series, elapsed seconds of each method
+    """
+
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({'RH': rng.uniform(10, 60, n),
+                       'RH_span': rng.uniform(0, 5, n),
+                       'RH_temp': rng.uniform(5, 35, n),
+                       'licor_press': rng.uniform(95, 105, n),
+                       'xCO2': rng.uniform(300, 500, n)})
+
+    elapsed = {}
+
+    with utils.Timer('apply') as t:
+        vp_sat = df.RH_temp.apply(physics.calc_sat_vapor_press)
+        df['vp_licor'] = physics.calc_vapor_pressure(df.RH, df.RH_span, vp_sat)
+        xco2_apply = df.apply(dry, axis=1).values
+    elapsed['apply'] = t.elapsed
+
+    with utils.Timer('vectorized') as t:
+        vp_sat = physics.calc_sat_vapor_press(df.RH_temp.values)
+        vp = physics.calc_vapor_pressure(df.RH.values, df.RH_span.values, vp_sat)
+        xco2_vector = physics.calc_co2_dry(df.xCO2.values, df.licor_press.values, vp)
+    elapsed['vectorized'] = t.elapsed
+
+    with utils.Timer('fused') as t:
+        xco2_fused = physics.xco2_dry_from_cycles(df.RH.values, df.RH_span.values,
+                                                  df.RH_temp.values, df.licor_press.values,
+                                                  df.xCO2.values)
+    elapsed['fused'] = t.elapsed
+
+    assert np.allclose(xco2_apply, xco2_vector) and np.allclose(xco2_apply, xco2_fused)
+
+    return pd.Series(elapsed)
+
+
 def t_range(t_start, t_end, days_in_past):
     """Determine the range of data to process based on three values.
     All string inputs are formatted str, time in mm/dd/yyyy hh:mm
@@ -403,7 +448,7 @@ def calculate(df):
     df['vp_licor'] = np.nan
 
     for s in systems:
-        vp_sat = df.loc[(s, 'apof'), 'RH_temp'].apply(physics.calc_sat_vapor_press).values
+        vp_sat = physics.calc_sat_vapor_press(df.loc[(s, 'apof'), 'RH_temp'].values)
         df.loc[(s, 'apof'), 'vp_sat'] = vp_sat
         df.loc[(s, 'epof'), 'vp_sat'] = vp_sat
 
@@ -414,11 +459,16 @@ def calculate(df):
                                               rh_span   = df.loc[(s, 'spcl'), 'RH'],
                                               vp_sat    = df.loc[(s, 'epof'), 'vp_sat'])
 
-        df.loc[(s, 'apof'), 'vp_licor'] = vp_apof.values
-        df.loc[(s, 'epof'), 'vp_licor'] = vp_epof.values
+        df.loc[(s, 'apof'), 'vp_licor'] = np.asarray(vp_apof)
+        df.loc[(s, 'epof'), 'vp_licor'] = np.asarray(vp_epof)
 
-        df.loc[(s, 'apof'), 'xCO2_dry'] = df.loc[s, 'apof'].apply(dry, axis=1).values
-        df.loc[(s, 'epof'), 'xCO2_dry'] = df.loc[s, 'epof'].apply(dry, axis=1).values
+        for cycle in ['apof', 'epof']:
+            _df = df.loc[s, cycle]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                xco2_dry = np.asarray(physics.calc_co2_dry(xco2=_df.xCO2.values,
+                                                           press=_df.licor_press.values,
+                                                           vapor_press=_df.vp_licor.values))
+            df.loc[(s, cycle), 'xCO2_dry'] = np.where(np.isfinite(xco2_dry), xco2_dry, np.nan)
 
     calc_apon_epon_relative_press(df)
     calc_cycle_relative_press(df)
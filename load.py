@@ -6,15 +6,17 @@ Created on Mon Jul 25 14:30:25 2016
 """
 
 import os
+import re
 import unicodedata
 import numpy as np
 import pandas as pd
 import xarray as xr
 
 from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
 
-from . import config, utils
-from .algebra import float_year_to_datetime, common_key_row, timestamp_rounder
+from . import config, datatypes, utils
+from .algebra import float_years_to_datetime, common_key_row, mbl_lat_sin
 
 
 def sniff(file):
@@ -54,6 +56,129 @@ def file_to_list(file):
     return data
 
 
+def build_frame_index(file, verbose=False):
+    """Index the byte offset of every frame in a flash or terminal
+    data file, so frames can be read without scanning the whole file
+
+    Parameters
+    ----------
+    file : str, filepath to file
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    Pandas DataFrame, one row per frame with columns:
+        offset : int, byte offset of the frame header line
+        length : int, number of bytes in the frame
+        datetime_mapco2 : str, header timestamp
+        datetime64_ns : datetime64[ns], header timestamp
+        system : str, header system
+        mode : str, header mode i.e. 'NORM'
+    """
+
+    with open(file, mode='rb') as f:
+        raw = f.read()
+
+    delimiters = b'|'.join(d.encode('utf-8') for d in config.pco2_start_delimiters)
+    pattern = re.compile(b'^[ \t]*(?:' + delimiters + b')', flags=re.MULTILINE)
+
+    offsets = []
+    headers = []
+    for match in pattern.finditer(raw):
+        line_end = raw.find(b'\n', match.start())
+        if line_end == -1:
+            line_end = len(raw)
+        line = raw[match.start():line_end].decode('utf-8', errors='ignore')
+        h = datatypes.MAPCO2Header()
+        try:
+            h.parse(line)
+        except (IndexError, ValueError):
+            if verbose:
+                print('load.build_frame_index>> Unable to parse header:', line)
+            continue
+        offsets.append(match.start())
+        headers.append([h.datetime_mapco2, h.system, h.mode])
+
+    offsets = np.array(offsets, dtype=np.int64)
+    length = np.diff(np.append(offsets, len(raw)))
+
+    df = pd.DataFrame(headers, columns=['datetime_mapco2', 'system', 'mode'])
+    df.insert(0, 'offset', offsets)
+    df.insert(1, 'length', length)
+    df.insert(3, 'datetime64_ns', pd.to_datetime(df.datetime_mapco2,
+                                                 format=config.header_datetime_format,
+                                                 errors='coerce'))
+    return df
+
+
+def frame_index(file, rebuild=False, verbose=False):
+    """Load the sidecar '.idx' frame index of a flash or terminal data file,
+    building and saving it if it doesn't exist or is older than the file.
+
+    Parameters
+    ----------
+    file : str, filepath to file
+    rebuild : bool, force the index to be rebuilt
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    Pandas DataFrame, see build_frame_index
+    """
+
+    idx_file = file + '.idx'
+
+    if ((not rebuild) and os.path.exists(idx_file) and
+            (os.path.getmtime(idx_file) >= os.path.getmtime(file))):
+        df = pd.read_pickle(idx_file)
+        # the file has been appended to or truncated since indexing
+        if (len(df) > 0 and
+                df.offset.iloc[-1] + df.length.iloc[-1] == os.path.getsize(file)):
+            return df
+
+    if verbose:
+        print('load.frame_index>> Building index:', idx_file)
+
+    df = build_frame_index(file, verbose=verbose)
+    df.to_pickle(idx_file)
+    return df
+
+
+def read_frames(file, index=None, t_start=None, t_end=None):
+    """Read only the frames in a time window from a flash or terminal
+    data file using its frame index
+
+    Parameters
+    ----------
+    file : str, filepath to file
+    index : Pandas DataFrame, frame index, if None see frame_index
+    t_start : datetime-like, start of window (inclusive), None for no limit
+    t_end : datetime-like, end of window (inclusive), None for no limit
+
+    Returns
+    -------
+    data : list, lines of data from the selected frames, no cleaning
+    """
+
+    if index is None:
+        index = frame_index(file)
+
+    mask = np.ones(len(index), dtype=bool)
+    if t_start is not None:
+        mask &= (index.datetime64_ns >= pd.to_datetime(t_start)).values
+    if t_end is not None:
+        mask &= (index.datetime64_ns <= pd.to_datetime(t_end)).values
+    selected = index[mask]
+
+    data = []
+    with open(file, mode='rb') as f:
+        for offset, length in zip(selected.offset.values, selected.length.values):
+            f.seek(offset)
+            _b = f.read(length).decode('utf-8', errors='ignore')
+            data.extend(_b.splitlines(keepends=True))
+    return data
+
+
 def index_data(data):
     """Find indexes where an new frame of MAPCO2 data starts,
     as well as where the pH data is saved
@@ -66,30 +191,31 @@ def index_data(data):
 
     Returns
     -------
-    out : list, nested list of lines where dataframes start
+    out : list, nested list of lines where dataframes start, columns
+        in the order of datatypes.frame_data_types
     """
 
+    # first 4 characters of a start line to index column, see datatypes.aux_sensors
+    aux_columns = {_id: k + 1 for k, sensor in enumerate(datatypes.aux_sensors.values())
+                   for _id in sensor.index_ids}
+    n_columns = len(datatypes.aux_sensors) + 1
+
     c = 0
     i = 0
-    out = [['']*5 for _ in range(5000)]
+    out = [['']*n_columns]
 
     for _line in data:
         _id = _line[0:4]
 
         if _id in config.pco2_start_delimiters:
             out[i][0] = c
+            out.append(['']*n_columns)
             i += 1
-        if _id in ['Sami', 'PH']:
-            out[i][1] = c
-        if _id == 'Seaf':
-            out[i][2] = c
-        if _id == 'SBE1':
-            out[i][3] = c
-        if _id == 'Met ':  # note single whitespace - bad luck, full line is 'Met Data'
-            out[i][4] = c
+        k = aux_columns.get(_id)
+        if k is not None:
+            out[i][k] = c
         c += 1
 
-    out = out[:i+1]
     return out
 
 
@@ -106,11 +232,9 @@ def create_index_dataframe(index_list):
     _df : Pandas Dataframe
     """
 
-    _df = pd.DataFrame(index_list, columns=config.frame_data_types)
-    _df.ph_sami = _df.ph_sami.shift(-1)
-    _df.ph_seafet = _df.ph_seafet.shift(-1)
-    _df.sbe16 = _df.sbe16.shift(-1)
-    _df.met = _df.met.shift(-1)
+    _df = pd.DataFrame(index_list, columns=datatypes.frame_data_types())
+    for name in datatypes.aux_sensors:
+        _df[name] = _df[name].shift(-1)
     _df = _df.dropna(axis=0)
 
     return _df
@@ -165,7 +289,7 @@ def create_start_end(index_df):
         if 'start' in name:
             index_df[name.replace('start', 'end')] = ''
 
-    for name in config.frame_data_types:
+    for name in datatypes.frame_data_types():
         index_df[name + '_end'] = index_df[name + '_start']
         index_df[name + '_end'] = index_df[name + '_end'].astype(int)
         index_df[name + '_end'] += config.frame_default_number_of_list_lines
@@ -247,7 +371,107 @@ def frames(lc, start, end, delimiters):
     return data
 
 
-def load_file(f, datatype, system=None, verbose=False):
+def frame_list_types():
+    """List column name, index column name and start/end delimiters of
+    each data type, auxiliary sensors from datatypes.aux_sensors
+
+    Returns
+    -------
+    list of tuple, (name, index name, [start delimiter, end delimiter])
+    """
+
+    return ([(name, name, sensor.delimiters)
+             for name, sensor in datatypes.aux_sensors.items()] +
+            [('co2', 'mapco2', ['NORM', 'SW_xCO2(dry)'])])
+
+
+def frame_spans(lc, start, end, delimiters):
+    """Get line offsets of one type of data in a data file, the offset
+    version of frames.  The span runs from start to the first line
+    matching the end delimiter, inclusive.
+
+    Parameters
+    ----------
+    lc : list, lines of cleaned data
+    start : array-like, indexes of start of data frame in lc
+    end : array-like, indexes of end of data frame in lc
+    delimiters : list of 2 str, characters to use as start and end of
+        section of data
+
+    Returns
+    -------
+    span_start : array of int, index of first line, -999 if no data
+    span_end : array of int, index after last line, -999 if no data
+    """
+
+    delim_end = delimiters[1]
+
+    start = np.asarray(start, dtype=int)
+    end = np.minimum(np.asarray(end, dtype=int), len(lc))
+    span_start = start.copy()
+    span_end = np.full(len(start), -999, dtype=int)
+
+    for i in range(len(start)):
+        if start[i] == -999:
+            continue
+        span_end[i] = end[i]
+        if delim_end == '':
+            continue
+        for j in range(start[i], end[i]):
+            if lc[j][0:len(delim_end)] == delim_end:
+                span_end[i] = j + 1
+                break
+
+    return span_start, span_end
+
+
+def frame_views(df, name):
+    """Lazy views of one type of data from a DataFrame returned by
+    load_file with offsets=True
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, with 'lines' and 'name'_list_start/end columns
+    name : str, data type, one of 'sbe16', 'ph_sami', 'ph_seafet', 'met', 'co2'
+
+    Returns
+    -------
+    list of datatypes.FrameView, empty view where no data was found
+    """
+
+    return [datatypes.FrameView(lines, 0, 0) if start == -999
+            else datatypes.FrameView(lines, start, end)
+            for lines, start, end in zip(df.lines.values,
+                                         df[name + '_list_start'].values,
+                                         df[name + '_list_end'].values)]
+
+
+def aux_dataframe(df, name):
+    """Parse one auxiliary sensor data type of every frame of a DataFrame
+    from load_file with the sensor's registered batch parser
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, from load_file with or without offsets
+    name : str, sensor name in datatypes.aux_sensors, i.e. 'sbe16'
+
+    Returns
+    -------
+    Pandas DataFrame, with 'common_key' of the frame each row came from
+    """
+
+    if name + '_list' in df.columns:
+        frames = df[name + '_list'].values
+    else:
+        frames = frame_views(df, name)
+
+    _df = datatypes.aux_sensors[name].parse_many(frames)
+    rows = _df.frame.values if 'frame' in _df.columns else np.arange(len(_df))
+    _df.insert(0, 'common_key', df.common_key.values[rows])
+    return _df
+
+
+def load_file(f, datatype, system=None, offsets=False, verbose=False):
     """Load all available data types in a file
     Note: data types are determined by delimiter definitions, which
     are hardcoded below.
@@ -260,6 +484,10 @@ def load_file(f, datatype, system=None, verbose=False):
         For now a simple convention: 'm' = mapco2, 'a' = asv, 'w' = waveglider
     system : str, electronics system serial number.  Primarily used for single flash
         imports. Example: System 0176 = '0176'
+    offsets : bool, if True store the cleaned lines once in column 'lines'
+        and (start, end) int offsets per data type in columns
+        'name'_list_start and 'name'_list_end instead of copied line lists,
+        see frame_views
     verbose : bool, print verbose statements
 
     Returns
@@ -302,40 +530,34 @@ def load_file(f, datatype, system=None, verbose=False):
 
     df['common_key'] = df.apply(common_key_row, axis=1)
 
-    df['sbe16_list'] = frames(lc,
-                              start=df.sbe16_start,
-                              end=df.sbe16_end,
-                              delimiters=['SBE16 DATA', 'END SBE16'])
-
-    df['ph_sami_list'] = frames(lc,
-                                start=df.ph_sami_start,
-                                end=df.ph_sami_end,
-                                delimiters=['PH', 'END PH'])
-
-    df['ph_seafet_list'] = frames(lc,
-                                  start=df.ph_seafet_start,
-                                  end=df.ph_seafet_end,
-                                  delimiters=['Seafet Data', 'End Seafet Data'])
-
-    df['met_list'] = frames(lc,
-                            start=df.met_start,
-                            end=df.met_end,
-                            delimiters=['Met', ''])
+    for name, index_name, delimiters in frame_list_types():
+        if offsets:
+            span_start, span_end = frame_spans(lc,
+                                               start=df[index_name + '_start'].values,
+                                               end=df[index_name + '_end'].values,
+                                               delimiters=delimiters)
+            df[name + '_list_start'] = span_start
+            df[name + '_list_end'] = span_end
+        else:
+            df[name + '_list'] = frames(lc,
+                                        start=df[index_name + '_start'],
+                                        end=df[index_name + '_end'],
+                                        delimiters=delimiters)
 
-    df['co2_list'] = frames(lc,
-                            start=df.mapco2_start,
-                            end=df.mapco2_end,
-                            delimiters=['NORM', 'SW_xCO2(dry)'])
+    if offsets:
+        # every row references the same buffer, pickle stores it once
+        df['lines'] = [lc] * len(df)
 
     return df
 
 
-def file_batch(f_list, datatype, verbose=False):
+def file_batch(f_list, datatype, offsets=False, verbose=False):
     """Load multiple iridium files using frames_all
 
     Parameters
     ----------
     f_list : list of str, filepath to file to parse
+    offsets : bool, store line offsets instead of line lists, see load_file
     verbose : bool, show debug statements
 
     Returns
@@ -347,7 +569,8 @@ def file_batch(f_list, datatype, verbose=False):
         print('load.file_batch>>')
     _df_list = []
     for n in range(0, len(f_list)):
-        _df = load_file(f=f_list[n], datatype=datatype[n], verbose=verbose)
+        _df = load_file(f=f_list[n], datatype=datatype[n], offsets=offsets,
+                        verbose=verbose)
         _df_list.append(_df)
 
     df = pd.concat(_df_list)
@@ -595,11 +818,9 @@ def mbl_source(mbl_file):
     Pandas DataFrame
     """
 
-    # grid latitude
-    lat_sin = np.linspace(-1.0, 1.0, 41)
     # create column names
     col_names = ['YYYY.YYYYYY']
-    for n in lat_sin:
+    for n in mbl_lat_sin:
         col_names.append("{0:.2f}".format(n))
         col_names.append("{0:.2f}".format(n) + "_uncert")
     # read in data
@@ -610,10 +831,75 @@ def mbl_source(mbl_file):
                    comment='#',
                    names=col_names)
     # format datetime
-    df['datetime_mbl'] = df['YYYY.YYYYYY'].map(float_year_to_datetime)
+    df['datetime_mbl'] = float_years_to_datetime(df['YYYY.YYYYYY'].values)
     return df
 
 
+class MBL(object):
+    """ESRL Marine Boundary Layer reference loaded once into 2D arrays
+    of time x sine of latitude, for interpolation at many positions
+
+    Parameters
+    ----------
+    mbl_file : str, filepath to .csv of MBL data from ESRL, see mbl_source
+    """
+
+    def __init__(self, mbl_file):
+        df = mbl_source(mbl_file)
+        df = df.sort_values('YYYY.YYYYYY')
+        df.reset_index(drop=True, inplace=True)
+
+        names = ['{0:.2f}'.format(n) for n in mbl_lat_sin]
+
+        self.lat_sin = mbl_lat_sin
+        self.datetime64_ns = df.datetime_mbl.values
+        self.xco2 = df[names].values
+        self.xco2_uncert = df[[n + '_uncert' for n in names]].values
+
+    def mbl_at(self, times, lats, uncert=False):
+        """Bilinear interpolation of MBL xCO2 in time and sine of latitude,
+        i.e. along a moving Wave Glider or ASV track in one call
+
+        Parameters
+        ----------
+        times : array-like of datetime64, times of positions
+        lats : array-like of float, latitudes of positions in decimal degrees
+        uncert : bool, also return interpolated uncertainty
+
+        Returns
+        -------
+        xco2 : array of float, NaN outside of the MBL time range
+        xco2_uncert : array of float, if uncert is True
+        """
+
+        t = self.datetime64_ns.astype('datetime64[ns]').astype(np.int64).astype(float)
+        x = (pd.to_datetime(np.atleast_1d(times)).values
+             .astype('datetime64[ns]').astype(np.int64).astype(float))
+        y = np.sin(np.deg2rad(np.clip(np.atleast_1d(np.asarray(lats, dtype=float)), -90, 90)))
+        x, y = np.broadcast_arrays(x, y)
+
+        i = np.clip(np.searchsorted(t, x, side='right') - 1, 0, len(t) - 2)
+        wt = (x - t[i]) / (t[i + 1] - t[i])
+
+        dy = self.lat_sin[1] - self.lat_sin[0]
+        j = np.clip(np.floor((y - self.lat_sin[0]) / dy).astype(int), 0, len(self.lat_sin) - 2)
+        wy = (y - self.lat_sin[j]) / dy
+
+        outside = (x < t[0]) | (x > t[-1]) | np.isnan(y)
+
+        def interpolate(a):
+            out = ((1 - wt) * (1 - wy) * a[i, j] +
+                   wt * (1 - wy) * a[i + 1, j] +
+                   (1 - wt) * wy * a[i, j + 1] +
+                   wt * wy * a[i + 1, j + 1])
+            out[outside] = np.nan
+            return out
+
+        if uncert:
+            return interpolate(self.xco2), interpolate(self.xco2_uncert)
+        return interpolate(self.xco2)
+
+
 def mbl_site(mbl_file):
     """Load MBL data generated for a specific site
     Note: this could be combined with the original loading
@@ -651,7 +937,22 @@ def netCDF(filepath):
     return ds.to_dataframe()
 
 
-def netCDF_batch(filepath_list):
+def netCDF_batch(filepath_list, lazy=False, **kwargs):
+    """Load many netCDF4 files from WHOI into one DataFrame
+
+    Parameters
+    ----------
+    filepath_list : list of str
+    lazy : bool, load with netCDF_lazy instead of reading every file whole
+    kwargs : passed to netCDF_lazy if lazy is True
+
+    Returns
+    -------
+    Pandas DataFrame, or xarray Dataset, see netCDF_lazy
+    """
+
+    if lazy:
+        return netCDF_lazy(filepath_list, **kwargs)
 
     df_list = []
 
@@ -662,6 +963,76 @@ def netCDF_batch(filepath_list):
     return df
 
 
+def netCDF_lazy(filepath_list, variables=None, t_start=None, t_end=None,
+                time_dim='TIME', chunk_size=100000, parallel=False, as_dataset=False):
+    """Load many netCDF4 files from WHOI/OceanSITES lazily with xarray
+    and dask.  Variables are selected from each file as it is opened and
+    the time slice is applied before any data is read.
+
+    Parameters
+    ----------
+    filepath_list : list of str, or str glob pattern
+    variables : list of str, data variables to keep, None for all
+    t_start : str or datetime, start of time slice, None for first time
+    t_end : str or datetime, end of time slice, None for last time
+    time_dim : str, name of time dimension, 'TIME' in OceanSITES files
+    chunk_size : int, number of times per dask chunk, None for one chunk
+        per file
+    parallel : bool, open files in parallel with dask.delayed
+    as_dataset : bool, return the lazy xarray Dataset instead of a DataFrame
+
+    Returns
+    -------
+    Pandas DataFrame, or xarray Dataset if as_dataset is True
+    """
+
+    def preprocess(ds):
+        if variables is not None:
+            ds = ds[variables]
+        return ds
+
+    chunks = None if chunk_size is None else {time_dim: chunk_size}
+
+    ds = xr.open_mfdataset(filepath_list, chunks=chunks, preprocess=preprocess,
+                           combine='by_coords', data_vars='minimal', coords='minimal',
+                           compat='override', parallel=parallel)
+
+    if (t_start is not None) or (t_end is not None):
+        ds = ds.sel({time_dim: slice(t_start, t_end)})
+
+    if as_dataset:
+        return ds
+    return ds.to_dataframe()
+
+
+def SAMI2_QCd_header(filepath, max_lines=10):
+    """Find the first data line of a Sunburst Sensors SAMI2 QC program
+    output file and whether it has a salinity column
+
+    Parameters
+    ----------
+    filepath : str, path to .csv file output by QC program/MATLAB
+    max_lines : int, number of lines to search
+
+    Returns
+    -------
+    skiprows : int, number of lines before the data
+    names : list of str, column names of the data
+    """
+
+    with open(filepath) as f:
+        for n in range(max_lines):
+            line = f.readline().strip().split('\t')
+            if pd.isnull(pd.to_datetime(line[0], errors='coerce')):
+                continue
+            if len(line) == 5:
+                # with salinity applied there are more columns...
+                return n, ['datetime_sami', 'pH', 'SST_sami', 'SSS_sami', 'flags']
+            # constant salinity case
+            return n, ['datetime_sami', 'pH', 'SST_sami', 'flags']
+    raise ValueError('No SAMI2 QC data found in: ' + filepath)
+
+
 def SAMI2_QCd(filepath):
     """Load a Sunburst Sensors SAMI2 QC program output file
 
@@ -671,43 +1042,64 @@ def SAMI2_QCd(filepath):
 
     Returns
     -------
-    Pandas DataFrame
+    Pandas DataFrame, with int8 columns 'blank', 'sat', 'pump' and
+        'outlier' decoded from the 4 character 'flags' column
     """
 
-    # with salinity applied there are more columns...
-    try:
-        f_sami_names = ['datetime_sami', 'pH', 'SST_sami', 'SSS_sami', 'flags']
-        df_sami = pd.read_csv(filepath, header=2, sep='\t', names=f_sami_names,
-                              converters={'timestamp': str, 'flags': str})
-    # constant salinity case
-    except:
-        f_sami_names = ['datetime_sami', 'pH', 'SST_sami', 'flags']
-        df_sami = pd.read_csv(filepath, header=3, sep='\t', names=f_sami_names,
-                              converters={'timestamp': str, 'flags': str})
+    skiprows, names = SAMI2_QCd_header(filepath)
+    df_sami = pd.read_csv(filepath, skiprows=skiprows, header=None, sep='\t', names=names,
+                          dtype={'datetime_sami': str, 'flags': str})
 
     df_sami = df_sami.drop_duplicates()
     df_sami.reset_index(inplace=True, drop=True)
-    df_sami.flags = df_sami.flags.str.strip()
 
-    df_sami['outlier'] = df_sami.flags.str[3]
-    df_sami['pump'] = df_sami.flags.str[2]
-    df_sami['sat'] = df_sami.flags.str[1]
-    df_sami['blank'] = df_sami.flags.str[0]
+    # one row of 4 flag characters per sample, '0' or '1'
+    flags = df_sami['flags'].fillna('').str.strip().str.pad(4, side='right', fillchar='0')
+    df_sami['flags'] = flags
+    bits = (np.frombuffer(''.join(flags.str[:4]).encode(), dtype=np.uint8)
+            .reshape(len(df_sami), 4) - ord('0')).astype(np.int8)
+    # flag character position of each flag name
+    flag_names = [('outlier', 3), ('pump', 2), ('sat', 1), ('blank', 0)]
+    for name, n in flag_names:
+        df_sami[name] = bits[:, n]
 
-    df_sami['datetime64_ns_ph'] = pd.DatetimeIndex(df_sami.datetime_sami)
-    df_sami['datetime64_ns'] = df_sami['datetime64_ns_ph'].apply(timestamp_rounder)
+    df_sami['datetime64_ns_ph'] = pd.to_datetime(df_sami.datetime_sami)
+    df_sami['datetime64_ns'] = df_sami.datetime64_ns_ph.dt.floor('30min')
 
-    df_sami.pH.replace(to_replace='NaN', value=np.nan, inplace=True)
-    df_sami.pH = df_sami.pH.astype(float)
+    df_sami.pH = pd.to_numeric(df_sami.pH, errors='coerce')
 
-    df_sami['plot_outlier'] = np.where(df_sami.outlier == 1, df_sami.pH, np.nan)
-    df_sami['plot_pump'] = np.where(df_sami.pump == 1, df_sami.pH, np.nan)
-    df_sami['plot_sat'] = np.where(df_sami.sat == 1, df_sami.pH, np.nan)
-    df_sami['plot_blank'] = np.where(df_sami.blank == 1, df_sami.pH, np.nan)
+    plot = np.where(bits == 1, df_sami.pH.values[:, np.newaxis], np.nan)
+    for name, n in flag_names:
+        df_sami['plot_' + name] = plot[:, n]
 
     return df_sami
 
 
+def SAMI2_QCd_batch(filepath_list, max_workers=None):
+    """Load many SAMI2 QC program output files in parallel threads,
+    see SAMI2_QCd
+
+    Parameters
+    ----------
+    filepath_list : list of str, paths to .csv files output by QC program/MATLAB
+    max_workers : int, number of threads, None for the executor default
+
+    Returns
+    -------
+    Pandas DataFrame, with 'source' filename column
+    """
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dfs = list(executor.map(SAMI2_QCd, filepath_list))
+
+    for fp, _df in zip(filepath_list, dfs):
+        _df['source'] = os.path.basename(fp)
+
+    df = pd.concat(dfs, axis=0, join='outer')
+    df.reset_index(inplace=True, drop=True)
+    return df
+
+
 def ftp_data(filepath):
     """Load FTP realtime data"""
 
@@ -834,3 +1226,187 @@ def ndbc_df(itter, units=None):
     if units is not None:
         return _df, u
     return _df
+
+
+def ndbc_blocks(fp):
+    """Scan an NDBC .ascii file line by line and locate each deployment
+    block, without loading the file into memory
+
+    Parameters
+    ----------
+    fp : str, filepath to .ascii formatted NDBC data
+
+    Returns
+    -------
+    list of dict, one per deployment with keys:
+        header : list of str, column header names
+        units : list of str or None, split 'Depth' line
+        start : int, line number of first data line
+        offset : int, byte offset of first data line
+        nrows : int, number of data lines
+        gaps : list of int, line numbers of non data lines inside the block
+    """
+
+    blocks = []
+    block = None
+    offset = 0
+    with open(fp, 'rb') as f:
+        for n, line in enumerate(f):
+            line_offset = offset
+            offset += len(line)
+            line = line.decode(errors='replace')
+            if 'Deployment: ' in line:
+                block = {'header': [], 'units': None, 'start': None, 'offset': None,
+                         'nrows': 0, 'gaps': [], 'last': None}
+                blocks.append(block)
+                continue
+            if block is None:
+                continue
+            if line[0:8] == 'YYYYMMDD':
+                block['header'] = line.split()
+            elif line[0:5] == 'Depth':
+                block['units'] = line.split()
+            elif line[0:8].isdigit():
+                if block['start'] is None:
+                    block['start'] = n
+                    block['offset'] = line_offset
+                elif n != block['last'] + 1:
+                    block['gaps'].extend(range(block['last'] + 1, n))
+                block['last'] = n
+                block['nrows'] += 1
+
+    for block in blocks:
+        block.pop('last')
+    return [b for b in blocks if b['start'] is not None]
+
+
+def ndbc_columns(header, units):
+    """Column names for an NDBC block with the depth suffixes from the
+    'Depth' line, same names as ndbc_df
+
+    Parameters
+    ----------
+    header : list of str, column header names
+    units : list of str or None, split 'Depth' line
+
+    Returns
+    -------
+    list of str
+    """
+
+    if units is None:
+        return list(header)
+
+    depth = [int(i) for i in units if i.lstrip('-').isdigit()]
+
+    new_columns = []
+    n = 0
+    for c in header:
+        if 'QQQQ' in c:
+            c = 'quality'
+        if 'MMMM' in c:
+            c = 'mode'
+        for label in ['SSS', 'SAL', 'SST', 'TEMP', 'PRES']:
+            if label in c:
+                c = c + '_' + str(depth[n]).zfill(4)
+                n += 1
+        new_columns.append(c)
+    return new_columns
+
+
+def ndbc_datetime(yyyymmdd, hhmmss, seconds=True):
+    """Integer NDBC date and time columns to datetime64, without
+    string parsing
+
+    Parameters
+    ----------
+    yyyymmdd : array of int, date
+    hhmmss : array of int, time
+    seconds : bool, True if time is HHMMSS, False if HHMM
+
+    Returns
+    -------
+    array of datetime64[ns]
+    """
+
+    if not seconds:
+        hhmmss = hhmmss * 100
+    months = (yyyymmdd // 10000 - 1970) * 12 + (yyyymmdd // 100) % 100 - 1
+    days = months.astype('datetime64[M]').astype('datetime64[D]') + (yyyymmdd % 100 - 1)
+    s = (hhmmss // 10000) * 3600 + ((hhmmss // 100) % 100) * 60 + hhmmss % 100
+    return days.astype('datetime64[ns]') + s.astype('timedelta64[s]')
+
+
+def ndbc_read(fp, verbose=False):
+    """Read an NDBC .ascii file one deployment block at a time with
+    pd.read_csv, data columns as float32 with -9.999 as NaN.  Same
+    columns as ndbc_file.  The file is opened once and each block is
+    read from its byte offset, see ndbc_blocks.
+
+    Parameters
+    ----------
+    fp : str, filepath to .ascii formatted NDBC data
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    Pandas DataFrame with datetime64_ns index, empty if the file has
+        no deployment blocks
+    """
+
+    blocks = ndbc_blocks(fp)
+    if len(blocks) == 0:
+        if verbose:
+            print('load.ndbc_read>> No deployment data found in:', fp)
+        return pd.DataFrame(index=pd.DatetimeIndex([], name='datetime64_ns'))
+
+    dfs_to_concat = []
+    with open(fp, 'rb') as f:
+        for block in blocks:
+            names = ndbc_columns(block['header'], block['units'])
+            text_columns = names[:2] + [c for c in names if c in ('quality', 'mode')]
+            dtype = {c: (str if c in text_columns else np.float32) for c in names}
+
+            # gap line numbers relative to the first data line
+            skiprows = [g - block['start'] for g in block['gaps']]
+
+            f.seek(block['offset'])
+            _df = pd.read_csv(f, sep=r'\s+', header=None, names=names,
+                              skiprows=skiprows, nrows=block['nrows'],
+                              dtype=dtype, na_values=['-9.999'], keep_default_na=False)
+
+            _df['datetime_str'] = _df[names[0]] + ' ' + _df[names[1]]
+            _df['datetime64_ns'] = ndbc_datetime(_df[names[0]].values.astype(np.int64),
+                                                 _df[names[1]].values.astype(np.int64),
+                                                 seconds=(len(names[1]) == 6))
+            _df.index = _df.datetime64_ns
+            _df.index.name = 'datetime64_ns'
+            if verbose:
+                print(_df.head())
+            dfs_to_concat.append(_df)
+
+    return pd.concat(dfs_to_concat, axis=0, join='outer')
+
+
+def ndbc_batch(fp_list, max_workers=None, verbose=False):
+    """Read many NDBC .ascii station files in parallel threads,
+    see ndbc_read
+
+    Parameters
+    ----------
+    fp_list : list of str, filepaths to .ascii formatted NDBC data
+    max_workers : int, number of threads, None for the executor default
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    Pandas DataFrame with datetime64_ns index and 'source' filename column
+    """
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dfs = list(executor.map(lambda fp: ndbc_read(fp, verbose=verbose), fp_list))
+
+    for fp, _df in zip(fp_list, dfs):
+        _df['source'] = os.path.basename(fp)
+
+    return pd.concat(dfs, axis=0, join='outer')
@@ -8,9 +8,17 @@ lat                     float64
 lon                     float64
 datetime64_ns    datetime64[ns]
 
-TODO: centralize flag codes, messages
+GPS flag codes and messages are in config.gps_flag_*
 """
 
+import numpy as np
+import pandas as pd
+
+from . import config
+
+# mean Earth radius, km
+earth_radius = 6371.0
+
 
 def flag_off_station(row, t_start, t_end, flag_ok=2.0, flag_bad=4.10):
     if (((row.datetime64_ns < t_start) or (row.datetime64_ns > t_end)) and
@@ -20,27 +28,147 @@ def flag_off_station(row, t_start, t_end, flag_ok=2.0, flag_bad=4.10):
         return flag_ok
 
 
-def gps_std_filter(df_gps, t_start, t_end, target_lon, target_lat, max_std):
+def great_circle(lat1, lon1, lat2, lon2):
+    """Haversine great circle distance between points in decimal degrees,
+    vectorized over array inputs
+
+    Parameters
+    ----------
+    lat1, lon1 : array-like, first points
+    lat2, lon2 : array-like, second points
+
+    Returns
+    -------
+    array of float, distance in km
+    """
+
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float))
+                              for x in (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * earth_radius * np.arcsin(np.sqrt(a))
+
+
+def gps_std_filter(df_gps, t_start, t_end, target_lon, target_lat, max_std,
+                   max_distance=None, window='1D', group_col=None):
+    """Watch circle QC of GPS fixes.  Flags, in order of precedence:
+        config.gps_flag_time : outside the deployment start and end dates
+        config.gps_flag_off_station : farther than max_distance from target
+        config.gps_flag_drift : rolling std of position greater than max_std
+        config.gps_flag_ok : otherwise
+
+    Parameters
+    ----------
+    df_gps : Pandas DataFrame, see module docstring
+    t_start : datetime, start time of deployment
+    t_end : datetime, end time of deployment
+    target_lon : float or array-like, deployment longitude in decimal degrees
+    target_lat : float or array-like, deployment latitude in decimal degrees
+    max_std : float, limit of the rolling position std in km
+    max_distance : float, watch circle radius in km, None to skip
+    window : str, Pandas offset alias of the rolling std window
+    group_col : str or None, column identifying each mooring, for many
+        moorings in one DataFrame with per row targets
+
+    Returns
+    -------
+    gps : Pandas DataFrame, df_gps plus columns:
+        distance_km : great circle distance from target
+        position_std_km : rolling std of position
+        flag : float, GPS flag code
+        flag_note : str, see config.gps_flag_notes
+    episodes : Pandas DataFrame, one row per run of consecutive flagged
+        fixes, see gps_episodes
+    """
 
     gps = df_gps.copy()
 
-    gps['flag'] = 2.0
-    gps['flag_note'] = ''
+    lat = gps.lat.values.astype(float)
+    lon = gps.lon.values.astype(float)
+    target_lat = np.broadcast_to(np.asarray(target_lat, dtype=float), lat.shape)
+    target_lon = np.broadcast_to(np.asarray(target_lon, dtype=float), lon.shape)
+
+    gps['distance_km'] = great_circle(lat, lon, target_lat, target_lon)
+
+    # local east and north displacement from target, km
+    dlon = (lon - target_lon + 180.0) % 360.0 - 180.0
+    gps['_x'] = earth_radius * np.radians(dlon) * np.cos(np.radians(target_lat))
+    gps['_y'] = earth_radius * np.radians(lat - target_lat)
+
+    xy = gps.set_index(pd.DatetimeIndex(gps.datetime64_ns.values))[['_x', '_y']]
+    if group_col is None:
+        order = np.argsort(gps.datetime64_ns.values, kind='mergesort')
+        r = xy.iloc[order].rolling(window, min_periods=2).std()
+    else:
+        order = np.lexsort((gps.datetime64_ns.values, gps[group_col].values))
+        r = (xy.iloc[order]
+             .groupby(gps[group_col].values[order])
+             .rolling(window, min_periods=2).std())
+    position_std = np.empty(len(gps))
+    position_std[order] = np.sqrt(r._x.values ** 2 + r._y.values ** 2)
+    gps['position_std_km'] = position_std
+    gps = gps.drop(['_x', '_y'], axis=1)
+
+    outside_time = ((gps.datetime64_ns < t_start) | (gps.datetime64_ns > t_end)).values
+    if max_distance is None:
+        off_station = np.zeros(len(gps), dtype=bool)
+    else:
+        off_station = gps.distance_km.values > max_distance
+    drift = position_std > max_std
+
+    gps['flag'] = np.select([outside_time, off_station, drift],
+                            [config.gps_flag_time,
+                             config.gps_flag_off_station,
+                             config.gps_flag_drift],
+                            default=config.gps_flag_ok)
+    gps['flag_note'] = gps.flag.map(config.gps_flag_notes)
+
+    episodes = gps_episodes(gps, group_col=group_col)
 
-    # flag outside time range = 4.10
-    # gps['flag'] = gps.apply(lambda x: 4.10 if ((x.datetime64_ns < t_start) or
-    #                                            (x.datetime64_ns > t_end)) and
-    #                                             x.flag == 2.0
-    #                                        else x.flag,
-    #                         axis=1)
+    return gps, episodes
 
-    gps['flag'] = gps.apply(lambda row: flag_off_station(row, t_start, t_end),
-                            axis=1)
 
-    message = 'Outside deployment start and end dates'
-    gps['flag_note'] = gps.apply(lambda x: message if x.flag == 4.10
-                                                   else x.flag_note,
-                                 axis=1)
+def gps_episodes(gps, group_col=None):
+    """Run length summary of consecutive fixes with the same flag,
+    excluding config.gps_flag_ok
+
+    Parameters
+    ----------
+    gps : Pandas DataFrame, output of gps_std_filter
+    group_col : str or None, column identifying each mooring
+
+    Returns
+    -------
+    Pandas DataFrame with columns:
+        group_col : if used
+        flag : float, GPS flag code
+        flag_note : str
+        t_start : datetime64, first fix of the episode
+        t_end : datetime64, last fix of the episode
+        n : int, number of fixes
+        max_distance_km : float, farthest fix from target
+    """
+
+    sort_by = ['datetime64_ns'] if group_col is None else [group_col, 'datetime64_ns']
+    _gps = gps.sort_values(sort_by, kind='mergesort')
+
+    change = _gps.flag.ne(_gps.flag.shift())
+    if group_col is not None:
+        change |= _gps[group_col].ne(_gps[group_col].shift())
+    run = change.cumsum().values
+
+    flagged = (_gps.flag != config.gps_flag_ok).values
+    keys = ([] if group_col is None else [group_col]) + ['flag']
+    episodes = (_gps[flagged]
+                .groupby(run[flagged])
+                .agg(**{k: (k, 'first') for k in keys},
+                     t_start=('datetime64_ns', 'first'),
+                     t_end=('datetime64_ns', 'last'),
+                     n=('flag', 'size'),
+                     max_distance_km=('distance_km', 'max')))
+    episodes.insert(len(keys), 'flag_note', episodes.flag.map(config.gps_flag_notes))
+    episodes.reset_index(drop=True, inplace=True)
+    return episodes
 
 
 def mapco2_to_ddm(x):
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Parse meteorological data from MAPCO2 Iridium and flash frames
+
+A Met block starts with a 'Met Data' line (flash: a '***** Met' cycle
+header) followed by lines of values.  Frames with the Met fields of
+config.engr_header are named by config.met_columns, any other layout
+is numbered 'met_0', 'met_1', ...
+
+@author: Colin Dietrich
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import config, load
+from .sstc import nan_9s_values
+
+
+def met_lines(frame):
+    """Data lines of one Met block, from after the 'Met' line to the
+    first blank line, delimiter or start of the next MAPCO2 frame
+
+    Parameters
+    ----------
+    frame : list of str, lines of one Met block
+
+    Returns
+    -------
+    list of str
+    """
+
+    lines = []
+    for x in frame:
+        x = x.strip()
+        if (x == '' or x[0:3] == 'Met' or x[0:5] == '*****' or
+                x[0:7].lower() == 'end met' or x[0:4] in config.pco2_start_delimiters):
+            if len(lines) > 0:
+                break
+            continue
+        lines.append(x)
+    return lines
+
+
+def decode_frames(frames, columns=None):
+    """Decode many Met frames at once.  All values are parsed in one float
+    conversion and 9 filled values are set to NaN.
+
+    Parameters
+    ----------
+    frames : list of list of str, lines of each Met frame, i.e. the
+        'met_list' column from load.load_file or load.frame_views
+    columns : list of str, column names, default is looked up in
+        config.met_frame_columns by the number of values per frame
+
+    Returns
+    -------
+    Pandas DataFrame, one row per frame, NaN where a frame was empty or
+        shorter than the widest frame
+    """
+
+    tokens = [' '.join(met_lines(frame)).split() for frame in frames]
+    counts = np.array([len(t) for t in tokens], dtype=int)
+    flat = [x for t in tokens for x in t]
+
+    try:
+        values = np.array(flat, dtype=float)
+    except ValueError:
+        # garbled transmission, parse what is numeric
+        values = pd.to_numeric(pd.Series(flat, dtype=object), errors='coerce')
+        values = values.to_numpy(dtype=float, copy=True)
+    values[np.isin(values, nan_9s_values)] = np.nan
+
+    width = counts.max() if len(counts) > 0 else 0
+    data = np.full((len(counts), width), np.nan)
+    row = np.repeat(np.arange(len(counts)), counts)
+    col = np.arange(len(values)) - np.repeat(np.cumsum(counts) - counts, counts)
+    data[row, col] = values
+
+    if columns is None:
+        columns = config.met_frame_columns.get(width,
+                                               ['met_' + str(n) for n in range(width)])
+
+    return pd.DataFrame(data, columns=columns)
+
+
+def met_dataframe(df):
+    """Typed Met data for every frame of a DataFrame from load.load_file
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, with 'met_list' column, or with 'lines' and
+        offset columns if loaded with offsets=True
+
+    Returns
+    -------
+    Pandas DataFrame, same index as df with 'common_key', 'system' and
+        'datetime64_ns' columns of the frame, see decode_frames.  Can be
+        passed to plot_ply.default_data
+    """
+
+    if 'met_list' in df.columns:
+        frames = df.met_list.values
+    else:
+        frames = load.frame_views(df, 'met')
+
+    _df = decode_frames(frames)
+    _df.index = df.index
+    for n, c in enumerate([c for c in ['common_key', 'system', 'datetime64_ns']
+                           if c in df.columns]):
+        _df.insert(n, c, df[c].values)
+    return _df
@@ -22,6 +22,7 @@ Note 3. For other calcualtions refer to AADI Operating Manual TD218 and TD269
 """
 
 import numpy as np
+import pandas as pd
 
 
 def temperature_scaled(t_C):
@@ -185,3 +186,83 @@ def o2_air_saturation(o2cc, sol):
     """
 
     return 100 * o2cc / sol
+
+
+def compensate_dataframe(df, v_o2='v_o2', t_C=None, v_t='v_t', s='SSS', p=1013.25,
+                         d=0, s0=0, pc=0.032, dtype=np.float64):
+    """Run the full optode compensation for every row of df in one pass,
+    equivalent to temperature_scaled, s_c_f, p_c_f, solubility,
+    o2_compensate (all units) and o2_air_saturation.  Powers of the scaled
+    temperature and the shared salinity polynomial are computed once.
+
+    Parameters
+    ----------
+    df : Pandas DataFrame
+    v_o2 : str, column of oxygen voltage from Aanderaa output (0-5 VDC)
+    t_C : str, column of temperature (C), if None it is calculated from v_t
+    v_t : str, column of temperature voltage from Aanderaa output (0-5 VDC)
+    s : str or float, column of salinity or salinity (PSU)
+    p : str or float, column of air pressure or air pressure (hPa)
+    d : str or float, column of depth or depth (m)
+    s0 : float, salinity setting of instrument while recording (PSU)
+    pc : float, pressure compensation coefficient
+    dtype : numpy dtype of the output, i.e. np.float32 for long records
+
+    Returns
+    -------
+    Pandas DataFrame, same index as df, with columns:
+        t_C : temperature (C)
+        ts : scaled temperature
+        scf : salinity compensation factor
+        pcf : pressure compensation factor
+        solubility : solubility of oxygen in seawater (μM)
+        o2_uM : oxygen measured (μM)
+        o2_uM_comp : oxygen compensated for salinity and pressure (μM)
+        o2_mgl : oxygen compensated (mg/l)
+        o2_mll : oxygen compensated (ml/l)
+        o2_saturation : saturation of oxygen in air (%)
+    """
+
+    def column(x):
+        if isinstance(x, str):
+            return df[x].values.astype(dtype)
+        return np.full(len(df), x, dtype=dtype)
+
+    if t_C is None:
+        t = volts_to_temp_C(column(v_t))
+    else:
+        t = column(t_C)
+    sal = column(s)
+
+    ts = temperature_scaled(t)
+    ts2 = ts * ts
+    ts3 = ts2 * ts
+    ts4 = ts3 * ts
+    ts5 = ts4 * ts
+
+    # salinity polynomial shared by s_c_f and solubility
+    s_poly = -6.24097E-03 - 6.93498E-03 * ts - 6.90358E-03 * ts2 - 4.29155E-03 * ts3
+    c0 = -3.11680E-07
+
+    scf = np.exp((sal - s0) * s_poly + c0 * (sal * sal - s0 ** 2))
+    pcf = p_c_f(d=column(d), pc=pc)
+    sol = ((column(p) / 1013.25) * 44.659 *
+           np.exp(2.00856 + 3.224 * ts + 3.99063 * ts2 + 4.80299 * ts3 +
+                  0.978188 * ts4 + 1.71069 * ts5 +
+                  sal * s_poly + c0 * sal * sal))
+
+    o2 = volts_to_O2_uM(column(v_o2))
+    o2cc = o2 * scf * pcf
+
+    out = pd.DataFrame({'t_C': t,
+                        'ts': ts,
+                        'scf': scf,
+                        'pcf': pcf,
+                        'solubility': sol,
+                        'o2_uM': o2,
+                        'o2_uM_comp': o2cc,
+                        'o2_mgl': 32 * o2cc / 1000,
+                        'o2_mll': o2cc / 44.615,
+                        'o2_saturation': 100 * o2cc / sol},
+                       index=df.index)
+    return out.astype(dtype)
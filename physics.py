@@ -5,8 +5,39 @@ Colin Dietrich 2017
 colin.dietrich@noaa.gov
 """
 
+import functools
+import inspect
+
 import numpy as np
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _ufunc(n_args):
+    """Compile a scalar equation to a float64 NumPy ufunc with numba
+    when it is installed.  Without numba the equation is returned as is,
+    it is written with NumPy operations and already broadcasts over arrays.
+    Ufuncs only take positional arguments, so the compiled kernel is
+    wrapped to accept the equation's keyword arguments as well.
+    """
+    def decorator(f):
+        if numba is None:
+            return f
+        signature = 'float64(%s)' % ', '.join(['float64'] * n_args)
+        kernel = numba.vectorize([signature], nopython=True)(f)
+        parameters = inspect.signature(f)
+
+        @functools.wraps(f)
+        def wrapper(*args, **kwargs):
+            bound = parameters.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return kernel(*bound.args)
+        return wrapper
+    return decorator
+
 
 def relative_humidity(vapor_pressure, temperature, saturation_vapor_pressure):
     pass
@@ -35,9 +66,15 @@ def calc_sat_vapor_press(t_rh, f=1.004):
     float, saturation vapor pressure in kPa
     """
 
+    return _sat_vapor_press(t_rh, f)
+
+
+@_ufunc(2)
+def _sat_vapor_press(t_rh, f):
     return f * 0.61365 * np.exp((17.502 * t_rh) / (240.97 + t_rh))
 
 
+@_ufunc(1)
 def tetens(t_rh):
     """Form of Teten's Equation
     Tetens, O. 1930. Über einige meteorologische Begriffe. Z.
@@ -57,6 +94,7 @@ def tetens(t_rh):
     return 0.61365 * np.exp((17.502 * t_rh) / (t_rh + 240.97))
 
 
+@_ufunc(1)
 def buck_equation(T):
     """Buck Equation for approximation of saturated vapour pressure
     over water
@@ -75,6 +113,7 @@ def buck_equation(T):
     return 0.61121 * np.exp((18.678 - (T / 234.5)) * (T / (257.14 + T)))
 
 
+@_ufunc(3)
 def calc_vapor_pressure(rh_sample, rh_span, vp_sat):
     """Caclulate the vapor pressure of a sample,
     from Stacy's notes, requires citation
@@ -92,6 +131,7 @@ def calc_vapor_pressure(rh_sample, rh_span, vp_sat):
     return (rh_sample - rh_span) * (vp_sat / 100)
 
 
+@_ufunc(3)
 def calc_co2_dry(xco2, press, vapor_press):
     """Calculate CO2 dry from xCO2
 
@@ -107,3 +147,49 @@ def calc_co2_dry(xco2, press, vapor_press):
     """
 
     return xco2 / ((press - vapor_press) / press)
+
+
+@_ufunc(6)
+def _xco2_dry_kernel(rh_sample, rh_span, t_rh, press, xco2, f):
+    vp = (rh_sample - rh_span) * (f * 0.61365 * np.exp((17.502 * t_rh) / (240.97 + t_rh)) / 100)
+    return xco2 / ((press - vp) / press)
+
+
+def xco2_dry_from_cycles(rh_sample, rh_span, t_rh, press, xco2, f=1.004):
+    """Dry xCO2 from one cycle's humidity, temperature and pressure,
+    fused calc_sat_vapor_press, calc_vapor_pressure and calc_co2_dry.
+    With numba this is one compiled ufunc, otherwise the NumPy version
+    works in place on one output buffer.  Zero pressure returns NaN.
+
+    Parameters
+    ----------
+    rh_sample : array-like, relative humidity of the sample cycle pump off
+    rh_span : array-like, relative humidity of the span cycle post-cal
+    t_rh : array-like, temperature of the rh measurements in degrees C
+    press : array-like, pressure in licor (kPa)
+    xco2 : array-like, xCO2
+    f : float, enhancement factor, see calc_sat_vapor_press
+
+    Returns
+    -------
+    xco2_dry : array of float
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if numba is not None:
+            out = np.asarray(_xco2_dry_kernel(rh_sample, rh_span, t_rh, press, xco2, f))
+        else:
+            t_rh = np.asarray(t_rh, dtype=float)
+            press = np.asarray(press, dtype=float)
+            out = np.empty(np.broadcast(rh_sample, rh_span, t_rh, press, xco2).shape)
+            np.add(t_rh, 240.97, out=out)
+            np.divide(t_rh, out, out=out)
+            np.multiply(out, 17.502, out=out)
+            np.exp(out, out=out)
+            np.multiply(out, f * 0.61365 / 100, out=out)
+            np.multiply(out, np.subtract(rh_sample, rh_span), out=out)
+            np.subtract(press, out, out=out)
+            np.divide(out, press, out=out)
+            np.divide(xco2, out, out=out)
+        out[~np.isfinite(out) | (np.broadcast_to(press, out.shape) == 0)] = np.nan
+    return out
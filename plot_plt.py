@@ -13,7 +13,7 @@ import mpl_toolkits.axisartist as AA
 from matplotlib.ticker import FormatStrFormatter
 import matplotlib.ticker as mtick
 
-from . import config, plot, utils
+from . import algebra, config, plot, utils
 #from .utils import utils
 
 
@@ -716,7 +716,8 @@ def plot_dtstd(df, dt_data, cols=None):
             c += 1
 
 
-def plot_gps(df, gps_fit=None, center=None, width=7, title_str='', xlim=None, ylim=None):
+def plot_gps(df, gps_fit=None, center=None, width=7, title_str='', xlim=None, ylim=None,
+             fit=None):
     """Plot GPS data
     Note: Seaborn with reformat and break this plot
     Note: Opposite of 'gps_plot' use, will plot flagged data
@@ -726,8 +727,16 @@ def plot_gps(df, gps_fit=None, center=None, width=7, title_str='', xlim=None, yl
     df : Pandas Dataframe, with 'lon', 'lat' and 'flag' columns
     gps_fit : tuple of array-like, x and y values of fit circle
     center : 2 length array of float, x and y values of center
+    fit : Pandas Series, one row of algebra.lsq_circles fits with 'xc',
+        'yc' and 'r', used for gps_fit and center if they are None
     """
 
+    if fit is not None:
+        if gps_fit is None:
+            gps_fit = algebra.circle_points(fit.xc, fit.yc, fit.r)
+        if center is None:
+            center = (fit.xc, fit.yc)
+
     plt.scatter(df.lon, df.lat,
                 color='black', marker='x', label='GPS Data')
 
@@ -5,13 +5,15 @@ Created on Wed Apr 26 2017
 @author: Colin Dietrich
 """
 
+import os
+import numpy as np
 import pandas as pd
 
 from time import strftime
-from numpy import std
 
 from . import config
 from . import plot_plt
+from . import stats
 from .algebra import timestamp_rounder, common_key
 
 
@@ -93,6 +95,9 @@ def co2sys_xls_export(df, filepath,
         pH Scale = Total scale (mol/kg-SW)
         [B]T = Uppstrom, 1974
 
+    co2sys.carbonate_dataframe solves the same system in place
+    without the Excel step.
+
     TODO: find units for total_P, total_Si
 
     Parameters
@@ -182,8 +187,8 @@ def import_xlsx_cycle(df_dict, name, verbose=False):
     _df = df_dict[name]
     _df = _df.reset_index()
 
-    _df = _df.ix[:, ['Time', 'Calculated xCO2 from Averaged Data',
-                     'index', 'Mode', 'Raw1', 'Raw2']]
+    _df = _df.loc[:, ['Time', 'Calculated xCO2 from Averaged Data',
+                      'index', 'Mode', 'Raw1', 'Raw2']]
 
     renames = {'Time': 'cycle_datetime64_ns',
                'Calculated xCO2 from Averaged Data': 'xCO2',
@@ -217,6 +222,96 @@ def batch_reformat(df_dict, verbose=False):
     return new_df_dict
 
 
+def stack_xlsx_cycles(df_dict, verbose=False):
+    """Reformat all ten cycle worksheets of a VBA imported data set into one
+    long DataFrame, same columns and rows as import_xlsx_cycle for each
+    sheet.  Rows are in config.cycle_names order so each cycle is one
+    contiguous block, see xlsx_cycle.
+
+    Parameters
+    ----------
+    df_dict : dictionary of Pandas DataFrames, one for each worksheet
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    Pandas DataFrame with columns:
+        cycle_datetime64_ns : timestamp of the cycle
+        xCO2 : calculated xCO2 from averaged data
+        Raw1, Raw2 : raw Licor counts
+        cycle : categorical, cycle abbreviation
+        datetime64_ns : cycle timestamp floored to 30 minutes
+    """
+
+    names = list(config.cycle_names.keys())
+    cycles = list(config.cycle_names.values())
+
+    sheets = []
+    for name in names:
+        if verbose:
+            print('Working on:', name, config.cycle_names[name])
+        _df = df_dict[name]
+        sheets.append(pd.DataFrame({'cycle_datetime64_ns': _df['Time'].values,
+                                    'xCO2': _df['Calculated xCO2 from Averaged Data'].values,
+                                    'mode': _df.index.values,
+                                    'Mode': _df['Mode'].values,
+                                    'Raw1': _df['Raw1'].values,
+                                    'Raw2': _df['Raw2'].values}))
+
+    lengths = [len(_df) for _df in sheets]
+    df = pd.concat(sheets, ignore_index=True)
+    df['cycle'] = pd.Categorical.from_codes(np.repeat(np.arange(len(cycles)), lengths),
+                                            categories=cycles)
+
+    df = df[df[['cycle_datetime64_ns', 'xCO2', 'mode', 'Mode', 'Raw1', 'Raw2']].notnull().any(axis=1)]
+    df = df[df['mode'] != 'DEPL']
+    df = df.drop(['mode', 'Mode'], axis=1)
+    df['cycle_datetime64_ns'] = pd.to_datetime(df.cycle_datetime64_ns)
+    df['datetime64_ns'] = df.cycle_datetime64_ns.dt.floor('30min')
+    df.reset_index(drop=True, inplace=True)
+
+    return df
+
+
+def xlsx_cycle(df, cycle):
+    """Rows of one cycle from stack_xlsx_cycles, as a positional slice
+    of the contiguous block rather than a boolean mask copy
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, output of stack_xlsx_cycles
+    cycle : str, cycle abbreviation, i.e. 'apof'
+
+    Returns
+    -------
+    Pandas DataFrame
+    """
+
+    codes = df.cycle.cat.codes.values
+    code = list(df.cycle.cat.categories).index(cycle)
+    start, end = np.searchsorted(codes, [code, code + 1])
+    return df.iloc[start:end]
+
+
+def xlsx_air_sw(df):
+    """Air Pump Off and Equil Pump Off rows of stack_xlsx_cycles with the
+    column names used for merges, same as batch_reformat
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, output of stack_xlsx_cycles
+
+    Returns
+    -------
+    apof : Pandas DataFrame, with xCO2_Air column
+    epof : Pandas DataFrame, with xCO2_SW column
+    """
+
+    apof = xlsx_cycle(df, 'apof').assign(xCO2_Air=lambda x: x.xCO2)
+    epof = xlsx_cycle(df, 'epof').assign(xCO2_SW=lambda x: x.xCO2)
+    return apof, epof
+
+
 def std_outlier_detecter(data_series, std=1):
     """Identify outlier values in a timeseries
 
@@ -264,6 +359,85 @@ def dt_std_outlier_detector(df, timeseries, std_in=(0.5, 1, 2, 3, 4)):
     return df
 
 
+def rolling_outliers(df, columns, window='7D', thresholds=(2, 3, 4),
+                     methods=('mad', 'std', 'iqr'), time_col='datetime64_ns',
+                     group_col=None, min_periods=3):
+    """Flag outliers against a centered, time based rolling window so the
+    limits follow seasonal changes in variance.  Every threshold is
+    evaluated in the same pass and reported as one int8 level per method.
+
+    Methods, as a score compared to each threshold:
+        'mad' : |x - rolling median| / (1.4826 * rolling MAD)
+        'std' : |x - rolling mean| / rolling std
+        'iqr' : distance outside the rolling IQR in units of IQR,
+                see stats.iqr_score
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, i.e. with 'xCO2_SW_dry' and 'xCO2_Air_dry' columns
+    columns : list of str, columns of timeseries data to test
+    window : str, Pandas offset alias of the window width, i.e. '7D'
+    thresholds : list of float, increasing score limits
+    methods : list of str, any of 'mad', 'std', 'iqr'
+    time_col : str, name of datetime64 column
+    group_col : str or None, column identifying each mooring, i.e. 'system'
+    min_periods : int, minimum values in a window to compute a score
+
+    Returns
+    -------
+    Pandas DataFrame, same index as df, with an int8 column
+        'column'_'method' for every column and method.  0 means no
+        threshold was exceeded, n means thresholds[n-1] was exceeded.
+    """
+
+    thresholds = np.sort(np.asarray(thresholds, dtype=float))
+
+    sort_by = [time_col] if group_col is None else [group_col, time_col]
+    _df = df.reset_index(drop=True).sort_values(sort_by, kind='mergesort')
+    values = _df.set_index(time_col)[columns]
+
+    def rolling(x):
+        if group_col is None:
+            return x.rolling(window, center=True, min_periods=min_periods)
+        return x.groupby(_df[group_col].values).rolling(window, center=True,
+                                                        min_periods=min_periods)
+
+    def score_array(r):
+        # groupby rolling prepends the group level, the row order is the same
+        return np.asarray(r, dtype=float)
+
+    x = values.values.astype(float)
+    scores = {}
+    if 'mad' in methods:
+        median = score_array(rolling(values).median())
+        deviation = pd.DataFrame(np.abs(x - median), index=values.index, columns=columns)
+        mad = 1.4826 * score_array(rolling(deviation).median())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores['mad'] = np.abs(x - median) / mad
+    if 'std' in methods:
+        r = rolling(values)
+        mean = score_array(r.mean())
+        sigma = score_array(r.std())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores['std'] = np.abs(x - mean) / sigma
+    if 'iqr' in methods:
+        r = rolling(values)
+        q1 = score_array(r.quantile(0.25))
+        q3 = score_array(r.quantile(0.75))
+        scores['iqr'] = stats.iqr_score(x, q1, q3)
+
+    out = {}
+    for method, score in scores.items():
+        score = np.where(np.isnan(score), -np.inf, score)
+        levels = (score[:, :, np.newaxis] > thresholds).sum(axis=2).astype(np.int8)
+        for n, column in enumerate(columns):
+            out[column + '_' + method] = levels[:, n]
+
+    flags = pd.DataFrame(out, index=_df.index).sort_index()
+    flags.index = df.index
+    return flags
+
+
 def build_ply_flag_df(df_dict, df_flags):
     """Build a Pandas DataFrame for plotting flags from a dictionary of DataFrames
     where keys are 'apon', 'apof' etc
@@ -503,4 +677,127 @@ def slice_df_cal(df_xlsx, t_start, t_end):
     df_cal = format_xlsx_import(df_cal, t_start, t_end)
     return df_cal
 
+
+
+def xlsx_store(path_in, rebuild=False, verbose=False):
+    """Load the worksheet columns used by the slice_df_* functions from a
+    compiled Excel workbook, cached as a columnar '.parquet' file next to
+    the workbook.  The cache is rebuilt if it is older than the workbook
+    or is missing any column now listed in config.xlsx_slice_columns.
+
+    Parameters
+    ----------
+    path_in : str, path to .xlsx file
+    rebuild : bool, force the workbook to be read again
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    Pandas DataFrame, one column per worksheet column named
+        'cycle abbreviation'_'column index', i.e. 'apof_25'
+    """
+
+    store_file = path_in + '.parquet'
+
+    if ((not rebuild) and os.path.exists(store_file) and
+            (os.path.getmtime(store_file) >= os.path.getmtime(path_in))):
+        df = pd.read_parquet(store_file)
+        if set(xlsx_column_names()).issubset(df.columns):
+            return df
+        if verbose:
+            print('qc.xlsx_store>> Column map changed, rebuilding:', store_file)
+
+    if verbose:
+        print('qc.xlsx_store>> Reading workbook:', path_in)
+
+    df = xlsx_columns(mapco2_xlsx_extractor(path_in))
+    df.to_parquet(store_file)
+    return df
+
+
+def xlsx_column_names():
+    """Names of the worksheet columns listed in config.xlsx_slice_columns
+
+    Returns
+    -------
+    list of str, 'cycle abbreviation'_'column index', time columns first
+        for each slice
+    """
+
+    abbreviations = dict(zip(config.xls_sheet_names, config.cycle_abbreviations))
+
+    names = []
+    for t_sheet, t_col, data_columns in config.xlsx_slice_columns.values():
+        names.append(abbreviations[t_sheet] + '_' + str(t_col))
+        for _, sheet, col in data_columns:
+            names.append(abbreviations[sheet] + '_' + str(col))
+    return names
+
+
+def xlsx_columns(df_xlsx):
+    """Collect the worksheet columns listed in config.xlsx_slice_columns
+    into one DataFrame, time columns as the worksheet strings and data
+    as float
+
+    Parameters
+    ----------
+    df_xlsx : dict, of Pandas DataFrames containing worksheets from xlsx source file
+
+    Returns
+    -------
+    Pandas DataFrame, see xlsx_store
+    """
+
+    abbreviations = dict(zip(config.xls_sheet_names, config.cycle_abbreviations))
+
+    columns = {}
+    for t_sheet, t_col, data_columns in config.xlsx_slice_columns.values():
+        name = abbreviations[t_sheet] + '_' + str(t_col)
+        t = df_xlsx[t_sheet].iloc[:, t_col]
+        columns[name] = t.astype(str).where(pd.notnull(t), None)
+        for _, sheet, col in data_columns:
+            name = abbreviations[sheet] + '_' + str(col)
+            columns[name] = pd.to_numeric(df_xlsx[sheet].iloc[:, col], errors='coerce')
+
+    df = pd.DataFrame(columns)
+    df.reset_index(drop=True, inplace=True)
+    return df
+
+
+def xlsx_slices(path_in, t_start, t_end, rebuild=False, verbose=False):
+    """Build the co2, gps, pressure and calibration slices of a compiled
+    Excel workbook in one pass, same output as slice_df_co2, slice_df_gps,
+    slice_df_pressure and slice_df_cal.  The workbook is only read once,
+    see xlsx_store.
+
+    Parameters
+    ----------
+    path_in : str, path to .xlsx file
+    t_start : datetime, start time of deployment
+    t_end : datetime, end time of deployment
+    rebuild : bool, force the workbook to be read again
+    verbose : bool, print debug statements
+
+    Returns
+    -------
+    dict, of Pandas DataFrames with keys 'co2', 'gps', 'pressure' and 'cal'
+    """
+
+    store = xlsx_store(path_in, rebuild=rebuild, verbose=verbose)
+    abbreviations = dict(zip(config.xls_sheet_names, config.cycle_abbreviations))
+
+    out = {}
+    for slice_name, (t_sheet, t_col, data_columns) in config.xlsx_slice_columns.items():
+        datetime_str = store[abbreviations[t_sheet] + '_' + str(t_col)]
+        _df = pd.DataFrame({'datetime_str': datetime_str})
+        for name, sheet, col in data_columns:
+            _df[name] = store[abbreviations[sheet] + '_' + str(col)]
+        _df['datetime64_ns'] = pd.to_datetime(datetime_str, errors='coerce').dt.floor('30min')
+        _df = _df[(_df.datetime64_ns >= t_start) & (_df.datetime64_ns <= t_end)]
+        _df.index = _df.datetime64_ns
+        _df.index.name = 'datetime64_ns'
+        out[slice_name] = _df
+
+    return out
+
 ##### see note above #####
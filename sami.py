@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Decode Sunburst Sensors SAMI2-pH hex records and calculate pH
+
+Type 0A record, hex characters after the '*' start character:
+    0:2     unique ID
+    2:4     record length, bytes from here to the checksum inclusive
+    4:6     record type, '0A'
+    6:14    record time, seconds since 1904-01-01
+    14:18   thermistor at start of measurement
+    18:82   16 reference (blank) light measurements
+    82:450  23 sets of 434 nm reference, 434 nm signal, 578 nm reference,
+            578 nm signal light measurements
+    450:454 unused
+    454:458 battery voltage
+    458:462 thermistor at end of measurement
+    462:464 checksum, low byte of the sum of bytes 2:462
+
+pH equations follow the Ocean Observatories Initiative PHWATER data
+product specification.  Indicator (mCP) dissociation constant from:
+Clayson and Byrne. 1993. Determination of the pH of seawater using
+m-cresol purple. Marine Chemistry 44(1): 111-113.
+
+@author: Colin Dietrich
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import config, load
+
+# hex character to nibble value, -1 where not a hex character
+_nibble = np.full(256, -1, dtype=np.int16)
+for _c in '0123456789ABCDEF':
+    _nibble[ord(_c)] = int(_c, 16)
+    _nibble[ord(_c.lower())] = int(_c, 16)
+
+
+def frame_records(frames):
+    """Find all type 0A hex records in SAMI2 frames
+
+    Parameters
+    ----------
+    frames : list of list of str, lines of each SAMI2 frame, i.e. the
+        'ph_sami_list' column from load.load_file or load.frame_views
+
+    Returns
+    -------
+    frame_index : array of int, index of the frame each record came from
+    records : list of str, hex records without the '*' start character
+    """
+
+    frame_index = []
+    records = []
+    for n, frame in enumerate(frames):
+        text = ''.join([x.strip() for x in frame])
+        for r in text.split('*')[1:]:
+            r = r[:config.sami2_record_chars]
+            if ((len(r) == config.sami2_record_chars) and
+                    (r[4:6] == config.sami2_record_type)):
+                frame_index.append(n)
+                records.append(r)
+    return np.array(frame_index, dtype=int), records
+
+
+def hex_words(records, start, n, width=4):
+    """Unsigned integer fields from fixed position hex records
+
+    Parameters
+    ----------
+    records : 2D array of int, nibble values, one row per record
+    start : int, first hex character of the field(s)
+    n : int, number of consecutive fields
+    width : int, hex characters per field
+
+    Returns
+    -------
+    2D array of int64, shape (number of records, n), -1 where a field
+        contained a character that is not hex
+    """
+
+    d = records[:, start:start + n * width].reshape(len(records), n, width)
+    words = d.astype(np.int64) @ (16 ** np.arange(width - 1, -1, -1, dtype=np.int64))
+    return np.where((d < 0).any(axis=2), -1, words)
+
+
+def decode(records):
+    """Decode type 0A hex records into typed arrays
+
+    Parameters
+    ----------
+    records : list of str, hex records without the '*' start character,
+        see frame_records
+
+    Returns
+    -------
+    dict of arrays with one row per record:
+        unique_id : int
+        record_time : datetime64[ns]
+        therm_start : int, thermistor counts at start
+        therm_end : int, thermistor counts at end
+        battery : int, battery voltage counts
+        ref : (n, 16) int, reference light measurements
+        light : (n, 92) int, light measurements
+        checksum_ok : bool
+    """
+
+    n_chars = config.sami2_record_chars
+    b = np.frombuffer(''.join(records).encode(), dtype=np.uint8).reshape(len(records), n_chars)
+    d = _nibble[b]
+
+    n_ref = config.sami2_n_ref
+    n_light = config.sami2_n_light
+    light_start = 18 + n_ref * 4
+    end = light_start + n_light * 4
+
+    byte_sum = hex_words(d, 2, (n_chars - 4) // 2, width=2).sum(axis=1)
+    checksum = hex_words(d, n_chars - 2, 1, width=2)[:, 0]
+
+    seconds = hex_words(d, 6, 1, width=8)[:, 0]
+    record_time = (np.datetime64(config.sami2_epoch, 'ns') +
+                   seconds.astype('timedelta64[s]').astype('timedelta64[ns]'))
+
+    return {'unique_id': hex_words(d, 0, 1, width=2)[:, 0],
+            'record_time': record_time,
+            'therm_start': hex_words(d, 14, 1)[:, 0],
+            'therm_end': hex_words(d, end + 8, 1)[:, 0],
+            'battery': hex_words(d, end + 4, 1)[:, 0],
+            'ref': hex_words(d, 18, n_ref),
+            'light': hex_words(d, light_start, n_light),
+            'checksum_ok': (byte_sum & 0xFF) == checksum}
+
+
+def thermistor(counts):
+    """Temperature from SAMI2 thermistor counts
+
+    Parameters
+    ----------
+    counts : array-like, 12 bit thermistor counts
+
+    Returns
+    -------
+    array of float, temperature in degrees C
+    """
+
+    counts = np.asarray(counts, dtype=np.float64)
+    rt = counts / (4096. - counts) * 17400.
+    ln_rt = np.log(rt)
+    inv_t = 0.0010183 + 0.000241 * ln_rt + 0.00000015 * ln_rt ** 3
+    return 1. / inv_t - 273.15
+
+
+def battery_voltage(counts):
+    """Battery voltage from SAMI2 battery counts
+
+    Parameters
+    ----------
+    counts : array-like, 12 bit battery counts
+
+    Returns
+    -------
+    array of float, volts
+    """
+
+    return np.asarray(counts, dtype=np.float64) * 15. / 4096.
+
+
+def ph(ref, light, t_C, s=35.,
+       ea434=config.sami2_ea434, eb434=config.sami2_eb434,
+       ea578=config.sami2_ea578, eb578=config.sami2_eb578,
+       ind_slp=1., ind_off=0., first_point=4):
+    """Calculate pH from SAMI2 light measurements.  The pH of each of the
+    23 measurements is regressed against indicator concentration and the
+    intercept is the pH corrected for indicator perturbation.
+
+    Parameters
+    ----------
+    ref : (n, 16) array, reference light measurements
+    light : (n, 92) array, light measurements
+    t_C : array-like, temperature in degrees C
+    s : array-like, salinity
+    ea434 : float, acid form molar absorptivity at 434 nm
+    eb434 : float, base form molar absorptivity at 434 nm
+    ea578 : float, acid form molar absorptivity at 578 nm
+    eb578 : float, base form molar absorptivity at 578 nm
+    ind_slp : float, indicator impurity slope correction
+    ind_off : float, indicator impurity offset correction
+    first_point : int, first of the 23 measurements used, earlier
+        measurements are not fully mixed
+
+    Returns
+    -------
+    array of float, pH on the total scale, NaN where fewer than 2
+        measurements were valid
+    """
+
+    ref = np.asarray(ref, dtype=np.float64)
+    light = np.asarray(light, dtype=np.float64).reshape(len(ref), config.sami2_n_light // 4, 4)
+    t_C = np.broadcast_to(np.asarray(t_C, dtype=np.float64), (len(ref),))[:, np.newaxis]
+    s = np.broadcast_to(np.asarray(s, dtype=np.float64), (len(ref),))[:, np.newaxis]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # blank intensity ratios, mean of the 4 sets of reference measurements
+        blank434 = (ref[:, 1::4] / ref[:, 0::4]).mean(axis=1)[:, np.newaxis]
+        blank578 = (ref[:, 3::4] / ref[:, 2::4]).mean(axis=1)[:, np.newaxis]
+
+        abs434 = -np.log10(light[:, :, 1] / light[:, :, 0]) + np.log10(blank434)
+        abs578 = -np.log10(light[:, :, 3] / light[:, :, 2]) + np.log10(blank578)
+        r = abs578 / abs434
+
+        pka = 1245.69 / (t_C + 273.15) + 3.8275 + 0.0021 * (35. - s)
+
+        dt = t_C - 24.788
+        _ea434 = ea434 - 26. * dt
+        _ea578 = ea578 + dt
+        _eb434 = eb434 + 12. * dt
+        _eb578 = eb578 - 71. * dt
+        e1 = _ea578 / _ea434
+        e2 = _eb578 / _ea434
+        e3 = _eb434 / _ea434
+
+        det = _ea434 * _eb578 - _eb434 * _ea578
+        hi = (abs434 * _eb578 - abs578 * _eb434) / det
+        i = (abs578 * _ea434 - abs434 * _ea578) / det
+        x = hi + i
+        y = pka + np.log10((r - e1) / (e2 - r * e3))
+
+        valid = np.isfinite(x) & np.isfinite(y)
+        valid[:, :first_point] = False
+        x = np.where(valid, x, 0.)
+        y = np.where(valid, y, 0.)
+
+        n = valid.sum(axis=1)
+        sx = x.sum(axis=1)
+        sy = y.sum(axis=1)
+        slope = (n * (x * y).sum(axis=1) - sx * sy) / (n * (x * x).sum(axis=1) - sx ** 2)
+        intercept = (sy - slope * sx) / n
+
+    intercept[n < 2] = np.nan
+    return intercept * ind_slp + ind_off
+
+
+def decode_frames(frames, s=35., **kwargs):
+    """Decode all SAMI2 records in many frames and calculate pH
+
+    Parameters
+    ----------
+    frames : list of list of str, lines of each SAMI2 frame, see
+        frame_records
+    s : float or array-like, salinity, one per frame if array-like
+    kwargs : passed to ph
+
+    Returns
+    -------
+    Pandas DataFrame, one row per record with columns:
+        frame : int, index of the frame in frames
+        datetime64_ns_ph, unique_id, therm_start, therm_end,
+        battery_v, checksum_ok, SST_sami, pH
+    """
+
+    frame_index, records = frame_records(frames)
+    d = decode(records)
+
+    s = np.asarray(s, dtype=np.float64)
+    if s.ndim > 0:
+        s = s[frame_index]
+
+    t_C = (thermistor(d['therm_start']) + thermistor(d['therm_end'])) / 2.
+
+    return pd.DataFrame({'frame': frame_index,
+                         'datetime64_ns_ph': d['record_time'],
+                         'unique_id': d['unique_id'],
+                         'therm_start': d['therm_start'],
+                         'therm_end': d['therm_end'],
+                         'battery_v': battery_voltage(d['battery']),
+                         'checksum_ok': d['checksum_ok'],
+                         'SST_sami': t_C,
+                         'pH': ph(d['ref'], d['light'], t_C, s=s, **kwargs)})
+
+
+def sami2_dataframe(df, s=35., **kwargs):
+    """pH for every SAMI2 record of a DataFrame from load.load_file
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, with 'ph_sami_list' column, or with 'lines' and
+        offset columns if loaded with offsets=True
+    s : float, str or array-like, salinity, or name of a salinity column in df
+    kwargs : passed to ph
+
+    Returns
+    -------
+    Pandas DataFrame, see decode_frames, with 'common_key' of the frame
+    """
+
+    if 'ph_sami_list' in df.columns:
+        frames = df.ph_sami_list.values
+    else:
+        frames = load.frame_views(df, 'ph_sami')
+
+    if isinstance(s, str):
+        s = df[s].values
+
+    _df = decode_frames(frames, s=s, **kwargs)
+    if 'common_key' in df.columns:
+        _df.insert(0, 'common_key', df.common_key.values[_df.frame.values])
+    return _df
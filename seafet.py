@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Parse Satlantic SeaFET pH data from MAPCO2 Iridium frames
+
+Each 'Seafet Data' ... 'End Seafet Data' block has a header line of
+date, time and number of samples followed by the mean and standard
+deviation of each value in config.seafet_columns.
+
+@author: Colin Dietrich
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import config, load
+from .sstc import nan_9s_values
+
+
+def decode_frames(frames):
+    """Decode many SeaFET frames at once.  All values are parsed in one
+    float conversion and 9 filled values are set to NaN.
+
+    Parameters
+    ----------
+    frames : list of list of str, lines of each SeaFET frame, i.e. the
+        'ph_seafet_list' column from load.load_file or load.frame_views
+
+    Returns
+    -------
+    Pandas DataFrame, one row per frame with columns:
+        datetime64_ns_seafet : SeaFET sample time, NaT if no data
+        n_samples : float, number of samples averaged
+        and config.seafet_columns, NaN where a frame was empty or incomplete
+    """
+
+    n_columns = len(config.seafet_columns)
+
+    header = []
+    valid = []
+    tokens = []
+    for frame in frames:
+        lines = [x for x in frame if x.strip() and ('Seafet Data' not in x)]
+        h = lines[0].split() if len(lines) > 0 else []
+        t = ' '.join(lines[1:]).split()
+        header.append(h if len(h) == 3 else ['', '', ''])
+        valid.append(len(t) == n_columns)
+        if len(t) == n_columns:
+            tokens += t
+
+    valid = np.array(valid, dtype=bool)
+    header = np.array(header, dtype=object).reshape(len(frames), 3)
+
+    try:
+        values = np.array(tokens, dtype=float)
+    except ValueError:
+        # garbled transmission, parse what is numeric
+        values = pd.to_numeric(pd.Series(tokens, dtype=object), errors='coerce')
+        values = values.to_numpy(dtype=float, copy=True)
+    values[np.isin(values, nan_9s_values)] = np.nan
+    data = np.full((len(frames), n_columns), np.nan)
+    data[valid] = values.reshape(-1, n_columns)
+
+    _df = pd.DataFrame(data, columns=config.seafet_columns)
+    _df.insert(0, 'datetime64_ns_seafet',
+               pd.to_datetime(pd.Series(header[:, 0] + ' ' + header[:, 1]),
+                              format=config.seafet_datetime_format, errors='coerce'))
+    _df.insert(1, 'n_samples', pd.to_numeric(pd.Series(header[:, 2]), errors='coerce'))
+    return _df
+
+
+def seafet_dataframe(df):
+    """Typed SeaFET data for every frame of a DataFrame from load.load_file
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, with 'ph_seafet_list' column, or with 'lines' and
+        offset columns if loaded with offsets=True
+
+    Returns
+    -------
+    Pandas DataFrame, same index as df with 'common_key', 'system' and
+        'datetime64_ns' columns of the frame, see decode_frames.  Can be
+        passed to plot_ply.ph_data
+    """
+
+    if 'ph_seafet_list' in df.columns:
+        frames = df.ph_seafet_list.values
+    else:
+        frames = load.frame_views(df, 'ph_seafet')
+
+    _df = decode_frames(frames)
+    _df.index = df.index
+    for n, c in enumerate([c for c in ['common_key', 'system', 'datetime64_ns']
+                           if c in df.columns]):
+        _df.insert(n, c, df[c].values)
+    return _df
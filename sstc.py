@@ -11,7 +11,7 @@ import pandas as pd
 from time import strftime
 from io import StringIO
 
-from . import config
+from . import config, load
 
 
 def clean_flash(data_list):
@@ -89,114 +89,103 @@ def to_stringIO(f):
     return fio
 
 
+def read_tao(f, name='value'):
+    """Read a TAO daily SST or SSC ascii file, keeping the date, time and
+    first data column.  Rows that don't start with a YYYYMMDD date are
+    skipped, same as to_stringIO, and rows can have any number of columns.
+
+    Parameters
+    ----------
+    f : str, filepath to TAO file
+    name : str, name for the data column
+
+    Returns
+    -------
+    Pandas DataFrame with columns:
+        t : datetime64_ns
+        name : float32
+    """
+
+    df = pd.read_csv(f, sep=r'\s+', header=None, usecols=[0, 1, 2],
+                     names=['YYYYMMDD', 'HHMMSS', name], dtype=str,
+                     on_bad_lines='skip')
+    df = df[df.YYYYMMDD.str.fullmatch(r'\d{8}')]
+
+    t = pd.to_datetime(df.YYYYMMDD + ' ' + df.HHMMSS, format='%Y%m%d %H%M%S')
+    return pd.DataFrame({'t': t.values,
+                         name: pd.to_numeric(df[name], errors='coerce').astype('float32').values})
+
+
+def regrid_daily(df, t0, t1, name='value', interval='3h', group_col=None):
+    """Reindex daily (or sparser) data to a regular interval and apply
+    the first value of each day to every interval in that day
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, with 't' and name columns, i.e. from read_tao
+    t0 : datetime, start of the interval grid
+    t1 : datetime, end of the interval grid
+    name : str, column of data to regrid
+    interval : str, Pandas offset alias, i.e. '3h' or '1h'
+    group_col : str or None, column identifying each buoy, to regrid
+        many buoys at once
+
+    Returns
+    -------
+    Pandas DataFrame, indexed by the grid times (and group_col first if
+        used) with columns:
+        name : data at grid times, NaN where there was none
+        day : int, count of days since the start of the grid
+        filled : first value in each day applied to the whole day, 0
+            where the day had no data
+    """
+
+    grid = pd.date_range(t0, t1, freq=interval, name='t')
+    keys = ['t'] if group_col is None else [group_col, 't']
+
+    _df = df.drop_duplicates(subset=keys).set_index(keys)[[name]]
+    if group_col is None:
+        _df = _df.reindex(index=grid)
+        t = _df.index
+    else:
+        index = pd.MultiIndex.from_product([_df.index.levels[0], grid], names=keys)
+        _df = _df.reindex(index=index)
+        t = _df.index.get_level_values('t')
+
+    # days start at midnight, rows before the first midnight are day 0
+    day = (t.normalize() - grid[0].normalize()).days.values
+    if grid[0] == grid[0].normalize():
+        day = day + 1
+    _df['day'] = day
+
+    by = ['day'] if group_col is None else [_df.index.get_level_values(group_col), 'day']
+    _df['filled'] = _df.groupby(by)[name].transform('first').fillna(0)
+
+    return _df
+
+
 def daily_to_3h(filepath, f_sst, f_ssc, t0, t1,
                 time_filter_results, interval_filter_results,
-                plot_data, save_data, title):
-        
-    # import SST data from hand cleaned file
-    f_sst = filepath + f_sst
-    io_sst = to_stringIO(f=f_sst)
-    
-    io_list = []
-    for line in io_sst:
-        out = line.split(" ")
-        io_list.append(out)
-    
-    sst_column_names = ["YYYYMMDD", "HHMMSS", "temp", "Q", "M"]
-    
-    df_sst = pd.DataFrame(io_list,
-                       columns=sst_column_names)
-    
-    df_sst.YYYYMMDD = df_sst.YYYYMMDD.astype(str)
-    df_sst.HHMMSS = df_sst.HHMMSS.astype(str)
-    
-    df_sst["t"] = df_sst.YYYYMMDD + " " + df_sst.HHMMSS
-    df_sst["t"] = pd.to_datetime(df_sst.t, format="%Y%m%d %H%M%S")
-    
-    df_sst = df_sst[["t", "temp"]]
-    
-    # import SSC data from hand cleaned file
-    f_ssc = filepath + f_ssc
-    io_ssc = to_stringIO(f=f_ssc)
-    
-    io_list = []
-    for line in io_ssc:
-        one = line.split(" ")
-        l = len(one)
-        if l < 12:
-            add_l = 12 - l
-            out = one[:-2] + ["-9.999"]*add_l + one[-2:]
-        else:
-            out = one
-        io_list.append(out)
-    
-    ssc_column_names = ["YYYYMMDD", "HHMMSS", "sal", 
-                        "S5", "S10", "S25", "S50", "S75", 
-                        "S100", "S125", "Q", "M"]
-    
-    df_sal = pd.DataFrame(io_list,
-                       columns=ssc_column_names)
-    
-    df_sal.YYYYMMDD = df_sal.YYYYMMDD.astype(str)
-    df_sal.HHMMSS = df_sal.HHMMSS.astype(str)
-    
-    df_sal["t"] = df_sal.YYYYMMDD + " " + df_sal.HHMMSS
-    df_sal["t"] = pd.to_datetime(df_sal.t, format="%Y%m%d %H%M%S")
-    df_sal = df_sal[["t", "sal"]]
-    
-    df_sal.sal = df_sal.sal.astype("float32")
-    df_sst.temp = df_sst.temp.astype("float32")
-    
-    ## make 3hr interval
-    hr3t = pd.date_range(t0, t1, freq="3H")
-    
+                plot_data, save_data, title, interval='3h'):
+
+    df_sst = read_tao(filepath + f_sst, name='temp')
+    df_sal = read_tao(filepath + f_ssc, name='sal')
+
     if time_filter_results:
         # use the t0 and t1 values defined above to filter to this deployment
         df_sal = df_sal[(df_sal.t >= t0) & (df_sal.t <= t1)]
         df_sst = df_sst[(df_sst.t >= t0) & (df_sst.t <= t1)]
-        
+
     if interval_filter_results:
         # only select data on hours that the MAPCO2 also runs [0, 3, 9, 12, 15, 18, 21]
-        df_sst["t_hr"] = pd.DatetimeIndex(df_sst.t).hour
-        df_sal["t_hr"] = pd.DatetimeIndex(df_sal.t).hour
-        df_sst["t_min"] = pd.DatetimeIndex(df_sst.t).minute
-        df_sal["t_min"] = pd.DatetimeIndex(df_sal.t).minute
-        
-        df_sst = df_sst[df_sst.t_min == 0]
-        df_sal = df_sal[df_sal.t_min == 0]
-        
         selector = [0, 3, 6, 9, 12, 15, 18, 21]
-        df_sst = df_sst[df_sst.t_hr.isin(selector)]
-        df_sal = df_sal[df_sal.t_hr.isin(selector)]
-        
-    hr3t = pd.date_range(t0, t1, freq="3H")
-    # reindex data to 3:00 hr interval, fill is NaN    
-    df_sst = df_sst.set_index("t")
-    df_sst = df_sst.reindex(index=hr3t)
-    df_sst['n'] = 0
-    df_sst.ix[df_sst.index.hour == 0, 'n'] = 1
-    df_sst['day'] = df_sst.n.cumsum()
-    df_sst = df_sst.drop('n', 1)
-    df_sst['filled'] = 0
-    df0 = df_sst[df_sst.temp.notnull()]
-    for i in df0.day.unique():
-        _n = df0.ix[df0.day == i, 'temp']
-        #print(i, _n[0])
-        df_sst.ix[df_sst.ix[df_sst.day == i].index, 'filled'] = _n[0]
-    
-    df_sal = df_sal.set_index("t")
-    df_sal = df_sal.reindex(index=hr3t)    
-    df_sal['n'] = 0
-    df_sal.ix[df_sal.index.hour == 0, 'n'] = 1
-    df_sal['day'] = df_sal.n.cumsum()
-    df_sal = df_sal.drop('n', 1)
-    df_sal['filled'] = 0
-    df0 = df_sal[df_sal.sal.notnull()]
-    for i in df0.day.unique():
-        _n = df0.ix[df0.day == i, 'sal']
-        #print(i, _n[0])
-        df_sal.ix[df_sal.ix[df_sal.day == i].index, 'filled'] = _n[0]
-        
+        df_sst = df_sst[(df_sst.t.dt.minute == 0) & df_sst.t.dt.hour.isin(selector)]
+        df_sal = df_sal[(df_sal.t.dt.minute == 0) & df_sal.t.dt.hour.isin(selector)]
+
+    # reindex data to interval, fill is NaN, then apply each day's value to the day
+    df_sst = regrid_daily(df_sst, t0, t1, name='temp', interval=interval)
+    df_sal = regrid_daily(df_sal, t0, t1, name='sal', interval=interval)
+
     if save_data:
     
         df_sal.to_csv("..\\" + title + "_ssc.csv", sep=",")
@@ -233,6 +222,72 @@ def daily_to_3h(filepath, f_sst, f_ssc, t0, t1,
     return df_sal, df_sst
 
 
+# float values of the MAPCO2 9 fill, parsed once for set-based masking
+nan_9s_values = np.array(sorted({float(x) for x in config.nan_9s if isinstance(x, str)}))
+
+
+def sbe16_array(frames):
+    """Decode many SBE16 frames at once.  All tokens are parsed in one
+    float conversion and 9 filled values are set to NaN.
+
+    Parameters
+    ----------
+    frames : list of list of str, lines of each SBE16 frame
+
+    Returns
+    -------
+    2D array of float, one row per frame, NaN padded where a frame was
+        empty or shorter than the widest frame
+    """
+
+    # tokens of each frame, counted with the same split used to parse them
+    tokens = [' '.join([x for x in frame if 'SBE' not in x]).split() for frame in frames]
+    counts = np.array([len(t) for t in tokens], dtype=int)
+    flat = [x for t in tokens for x in t]
+
+    try:
+        values = np.array(flat, dtype=float)
+    except ValueError:
+        # garbled transmission, parse what is numeric
+        values = pd.to_numeric(pd.Series(flat, dtype=object), errors='coerce')
+        values = values.to_numpy(dtype=float, copy=True)
+    values[np.isin(values, nan_9s_values)] = np.nan
+
+    width = counts.max() if len(counts) > 0 else 0
+    if (counts == width).all():
+        data = values.reshape(len(counts), width)
+    else:
+        data = np.full((len(counts), width), np.nan)
+        row = np.repeat(np.arange(len(counts)), counts)
+        col = np.arange(len(values)) - np.repeat(np.cumsum(counts) - counts, counts)
+        data[row, col] = values
+    return data
+
+
+def decode_sbe16(frames, columns=None):
+    """Decode many SBE16 frames into a table, see sbe16_array
+
+    Parameters
+    ----------
+    frames : list of list of str, lines of each SBE16 frame, i.e.
+        the 'sbe16_list' column from load.load_file or load.frame_views
+    columns : list of str, column names, default is looked up in
+        config.sbe16_frame_columns by the number of values per frame
+
+    Returns
+    -------
+    Pandas DataFrame, one row per frame
+    """
+
+    data = sbe16_array(frames)
+    width = data.shape[1]
+    if columns is None:
+        columns = config.sbe16_frame_columns.get(width,
+                                                 ['sbe16_' + str(n) for n in range(width)])
+
+    return pd.DataFrame(data, columns=columns)
+
+
 def clean_sbe16(list_data):
     """Clean list data in an iridium frame of SBE16 data
 
@@ -240,20 +295,34 @@ def clean_sbe16(list_data):
     ----------
     list_data : list
 
+    Returns
+    -------
+    list of float, NaN for 9 filled values
     """
 
-    ld = [x for x in list_data if 'SBE' not in x]
-    ld = ' '.join(ld)
-    ld = ld.split(' ')
-    ld = [x for x in ld if x != '']
-
-    # deal with uneven nan fill 9 characters
-    # rather than .replace_nan with floats of varying decimals later...
-    _ld = []
-    for x in ld:
-        if x in config.nan_9s:
-            x = np.nan
-        else:
-            x = np.float64(x)
-        _ld.append(x)
-    return _ld
+    return sbe16_array([list_data])[0].tolist()
+
+
+def sbe16_dataframe(df):
+    """Typed SBE16 data for every frame of a DataFrame from load.load_file
+
+    Parameters
+    ----------
+    df : Pandas DataFrame, with 'sbe16_list' column, or with 'lines' and
+        offset columns if loaded with offsets=True
+
+    Returns
+    -------
+    Pandas DataFrame, same index as df with 'common_key' column
+    """
+
+    if 'sbe16_list' in df.columns:
+        frames = df.sbe16_list.values
+    else:
+        frames = load.frame_views(df, 'sbe16')
+
+    _df = decode_sbe16(frames)
+    _df.index = df.index
+    if 'common_key' in df.columns:
+        _df.insert(0, 'common_key', df.common_key.values)
+    return _df
@@ -33,10 +33,29 @@ def iqr_mask(series, low=0.25, high=0.75):
     """
     q1 = np.percentile(series, low*100)
     q3 = np.percentile(series, high*100)
-    iqr = q3 - q1
-    iqr_mask = (series < (q1 - 1.5 * iqr)) | (series > (q3 + 1.5 * iqr))
+    iqr_mask = iqr_score(series, q1, q3) > 1.5
     return iqr_mask
 
+
+def iqr_score(series, q1, q3):
+    """Distance of values outside the Interquartile Range (IQR) in units
+    of IQR, i.e. 1.5 is the usual outlier fence.  q1 and q3 can be arrays,
+    for example rolling quantiles.
+
+    Parameters
+    ----------
+    series : array-like, data to score
+    q1 : float or array-like, first quartile
+    q3 : float or array-like, third quartile
+
+    Returns
+    -------
+    array-like, 0 or less inside the IQR
+    """
+    iqr = q3 - q1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.maximum(q1 - series, series - q3) / iqr
+
     
 class CurveFit(object):
     """Linear regression calculation and application using
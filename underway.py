@@ -7,6 +7,8 @@ import os
 import numpy as np
 import pandas as pd
 
+from concurrent.futures import ThreadPoolExecutor
+
 from pyMAPCO2.utils import files_in_directory
 
 # TODO: add to config.py
@@ -29,7 +31,7 @@ def rename_and_format(_df):
     _df : Pandas Dataframe
     """
 
-    _df.columns = [c.strip().lower().replace('  ', ' ').replace(' ', '_') for c in _df.columns]
+    _df.columns = go_columns(_df.columns)
     _df['datetime64_str'] = _df.pc_date.astype(str) + '_' + _df.pc_time.astype(str)
     _df['datetime64_ns'] = pd.to_datetime(_df.datetime64_str, format='%d/%m/%y_%H:%M:%S')
     return _df
@@ -163,6 +165,115 @@ def load_system(data_path, verbose=False):
     return _df
 
     
+def go_columns(columns):
+    """Normalize GO data file column names, as in rename_and_format
+
+    Parameters
+    ----------
+    columns : list of str, column names in GO data file header
+
+    Returns
+    -------
+    list of str
+    """
+
+    return [c.strip().lower().replace('  ', ' ').replace(' ', '_') for c in columns]
+
+
+def read_go(fp):
+    """Read one GO data file without parsing dates, see load_go
+
+    Parameters
+    ----------
+    fp : str, filepath to GO 'dat.txt' data file
+
+    Returns
+    -------
+    Pandas DataFrame
+    """
+
+    _df = pd.read_csv(fp, sep='\t')
+    _df.columns = go_columns(_df.columns)
+    return _df
+
+
+def go_datetime(dates, times):
+    """Vectorized datetime of GO 'pc_date' and 'pc_time' columns.  Dates
+    repeat for every record in a day so each unique date is parsed once,
+    zero padded 'HH:MM:SS' times are converted from their digits.
+
+    Parameters
+    ----------
+    dates : Pandas Series, str dates formatted '%d/%m/%y'
+    times : Pandas Series, str times formatted '%H:%M:%S'
+
+    Returns
+    -------
+    Pandas Series of datetime64[ns]
+    """
+
+    days = pd.to_datetime(dates.astype(str), format='%d/%m/%y', cache=True)
+
+    times = times.astype(str)
+    if (times.str.len() == 8).all():
+        d = (times.values.astype('S8').view(np.uint8).reshape(-1, 8) - ord('0')).astype(np.int64)
+        s = (d[:, 0] * 10 + d[:, 1]) * 3600 + (d[:, 3] * 10 + d[:, 4]) * 60 + d[:, 6] * 10 + d[:, 7]
+        return days + pd.to_timedelta(s, unit='s')
+    return days + pd.to_timedelta(times.values)
+
+
+def load_go(data_paths, max_workers=None, store_file=None, rebuild=False, verbose=False):
+    """Load all GO data files of many Underway pCO2 systems, reading files
+    in parallel threads and concatenating once.  Optionally cache the
+    result as a .parquet file, rebuilt if older than any data file.
+
+    Parameters
+    ----------
+    data_paths : list of str, path to folder containing GO data for each system
+    max_workers : int, number of threads, None for the executor default
+    store_file : str, filepath of .parquet cache, None for no cache
+    rebuild : bool, force the data files to be read again
+    verbose : bool, print debug information
+
+    Returns
+    -------
+    Pandas Dataframe, all data collected with the columns of load_system
+        and 'system', the folder name of each system.  Raises ValueError
+        if no GO data files are found.
+    """
+
+    f_list = []
+    systems = []
+    for data_path in data_paths:
+        files = files_in_directory(data_path, hint='dat.txt', skip=None)
+        f_list += [os.path.join(data_path, f) for f in files]
+        systems += [os.path.basename(os.path.normpath(data_path))] * len(files)
+
+    if len(f_list) == 0:
+        raise ValueError('No GO dat.txt files found in: ' + ', '.join(data_paths))
+
+    if ((store_file is not None) and (not rebuild) and os.path.exists(store_file) and
+            (os.path.getmtime(store_file) >= max([os.path.getmtime(f) for f in f_list],
+                                                 default=0))):
+        return pd.read_parquet(store_file)
+
+    if verbose:
+        print('underway.load_go>> Reading {} files'.format(len(f_list)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        dfs = list(executor.map(read_go, f_list))
+
+    _df = pd.concat(dfs, axis=0, ignore_index=True)
+    _df['system'] = np.repeat(systems, [len(d) for d in dfs])
+
+    _df['datetime64_str'] = _df.pc_date.astype(str) + '_' + _df.pc_time.astype(str)
+    _df['datetime64_ns'] = go_datetime(_df.pc_date, _df.pc_time)
+
+    if store_file is not None:
+        _df.to_parquet(store_file)
+    return _df
+
+
 def select_file():
     """Stand alone file selection function"""
     import tkinter
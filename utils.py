@@ -75,12 +75,13 @@ class Timer(object):
     
     def __enter__(self):
         self.tstart = time.time()
-        
-#    def __exit__(self, type, value, traceback):
-    def __exit__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.elapsed = time.time() - self.tstart
         if self.name:
             print('[%s]' % (self.name))
-        print('Elapsed: %s' % (time.time() - self.tstart))
+        print('Elapsed: %s' % self.elapsed)
 
 class Bunch:
     """Group dictionary items into Class attributes"""